@@ -6,10 +6,10 @@ One trigger (topic) → fully automated YouTube video.
 Pipeline Steps:
   1. Input topic
   2. Generate script with Gemini AI
-  3. Generate voiceover with Edge TTS
+  3. Generate voiceover with Edge TTS (mastered with FFmpeg)
   4. Fetch visuals from Pexels
-  5. Combine into .mp4 with MoviePy
-  6. Generate subtitles with Whisper & burn with FFmpeg
+  5. Render the .mp4 with FFmpeg (MoviePy as an optional renderer)
+  6. Generate subtitles from Edge TTS word timings (Whisper as fallback) & burn with FFmpeg
   7. Create thumbnail with Pillow
   8. Upload to YouTube (optional)
 """
@@ -18,30 +18,84 @@ import os
 import sys
 import shutil
 from datetime import datetime
+from functools import partial
 from dotenv import load_dotenv
 
 # ── Load environment variables ──────────────────────────────────────
 load_dotenv()
 
 # ── Import pipeline modules ─────────────────────────────────────────
-from scripts.generate_script import generate_script, extract_scenes, generate_metadata
-from scripts.generate_voice import make_voice
+from scripts.generate_script import (
+    generate_script,
+    generate_package,
+    extract_scenes,
+    generate_metadata,
+    GEMINI_MODEL,
+)
+from scripts.generate_voice import make_voice, save_words, load_words, VOICE
 from scripts.fetch_visuals import fetch_images_for_scenes, fetch_images
-from scripts.make_video import create_video
-from scripts.subtitles import generate_srt, burn_subtitles
-from scripts.thumbnail import create_thumbnail
+from scripts.audio import master_voice, choose_music
+from scripts.make_video import create_video, RESOLUTIONS, RENDERER
+from scripts.encoding import profile_name, get_profile
+from scripts import audio
+from scripts import motion, transitions
+from scripts.subtitles import (
+    generate_srt,
+    align_script,
+    burn_subtitles,
+    write_srt,
+    words_to_cues,
+    words_to_ass,
+    WHISPER_BACKEND,
+    WHISPER_MODEL,
+    SUBTITLE_STYLE,
+    ALIGN_SCRIPT,
+    KARAOKE,
+)
+from scripts.timeline import build_timeline, save_timeline, load_timeline, longest_scene_image
+from scripts.media import probe_duration
+from scripts.thumbnail import create_thumbnail, THUMB_SIZES
 from scripts.upload_youtube import upload_video
+from scripts.scheduler import Stage, run_stages, drop_invalidated
+from scripts import manifest, stage_cache
 import glob
 
+# Ask Gemini for script + scenes + metadata in a single structured call
+COMBINED_LLM = os.getenv("GEMINI_COMBINED", "1") != "0"
+
+# Burn subtitles during the main render instead of re-encoding the video afterwards
+SINGLE_PASS_SUBTITLES = os.getenv("SUBTITLES_SINGLE_PASS", "1") != "0"
+
+# Pipeline stages → (step label shown in the logs and reported as progress, banner)
+STAGES = {
+    "script": ("1/8", "Generating script..."),
+    "scenes": ("2/8", "Splitting script into visual scenes..."),
+    "metadata": ("3/8", "Generating YouTube metadata..."),
+    "voice": ("4/8", "Generating voiceover..."),
+    "master": ("4b", "Mastering the voiceover..."),
+    "visuals": ("5/8", "Fetching visuals from Pexels (per scene)..."),
+    "timeline": ("5b", "Timing scenes to the narration..."),
+    "video": ("6/8", "Creating video..."),
+    "transcribe": ("7/8", "Generating subtitles..."),
+    "subtitles": ("7/8", "Burning subtitles into video..."),
+    "thumbnail": ("7b", "Creating thumbnail..."),
+    "upload": ("8/8", "Uploading to YouTube..."),
+}
+
 
 def get_inputs():
     args = sys.argv[1:]
 
+    # ---- RESUME AN INTERRUPTED RUN ----
+    if len(args) >= 2 and args[0] == "--resume":
+        return {"resume": args[1]}
+
     if len(args) >= 4:
         topic = args[0]
         format_choice = args[1].lower()      # "short" or "video"
         upload_choice = args[2].lower()       # "true" / "false"
         privacy_choice = args[3].lower()      # "public" / "private"
+        run_id = args[4] if len(args) >= 5 else None  # optional, to name the run
 
         upload = upload_choice == "true"
 
@@ -49,7 +103,8 @@ def get_inputs():
             "topic": topic,
             "format": format_choice,
             "upload": upload,
-            "privacy": privacy_choice
+            "privacy": privacy_choice,
+            "run_id": run_id,
         }
 
     # ---- FALLBACK TO INTERACTIVE MODE ----
@@ -74,26 +129,42 @@ def get_inputs():
         "topic": topic,
         "format": format_choice,
         "upload": upload,
-        "privacy": privacy_choice
+        "privacy": privacy_choice,
+        "run_id": None,
     }
 
 
-def cleanup_generated_files(run_dir: str = None, final_video: str = None):
-    """Delete all generated files in the run directory, keeping only the final video."""
+def cleanup_generated_files(run_dir: str = None, final_video: str = None, keep_run_dir: bool = False) -> str:
+    """
+    Delete all generated files in the run directory, keeping only the final video.
+    With keep_run_dir the run directory (and its checkpoints) is left in place
+    so the run can be resumed.
+    Returns the path the final video was copied to.
+    """
     if not run_dir or not os.path.exists(run_dir):
-        return
+        return None
     
-    print("\n[Cleanup] Removing generated files...")
+    if keep_run_dir:
+        print("\n[Cleanup] Keeping run directory so the run can be resumed...")
+    else:
+        print("\n[Cleanup] Removing generated files...")
     
     # Remove entire run directory except final video
+    run_id = os.path.basename(os.path.normpath(run_dir))
+    final_output = None
     if final_video and os.path.exists(final_video):
-        # Move final video to output directory before cleanup
+        # Move final video to output directory before cleanup.
+        # Prefix with the run id so concurrent runs don't overwrite each other.
         output_dir = "output"
         os.makedirs(output_dir, exist_ok=True)
-        final_output = os.path.join(output_dir, os.path.basename(final_video))
+        final_output = os.path.join(output_dir, f"{run_id}_{os.path.basename(final_video)}")
         shutil.copy2(final_video, final_output)
         print(f"  Copied final video → {final_output}")
     
+    if keep_run_dir:
+        print(f"  Resume with: python main.py --resume {run_id}")
+        return final_output
+
     # Remove the entire run directory
     try:
         shutil.rmtree(run_dir)
@@ -102,6 +173,124 @@ def cleanup_generated_files(run_dir: str = None, final_video: str = None):
         print(f"  Warning: Could not delete {run_dir}: {e}")
     
     print("[Cleanup] Done.")
+    return final_output
+
+
+def _stage_hooks(progress):
+    """
+    Build the scheduler callbacks that print each step banner and report
+    start, completion or failure (with elapsed time) to `progress`.
+    """
+    def on_start(stage: str):
+        step, message = STAGES[stage]
+        print(f"\n[Step {step}] {message}")
+        if progress:
+            progress(stage, step, "running")
+
+    def on_finish(stage: str, result, error: Exception, elapsed: float):
+        step, _ = STAGES[stage]
+        if error is None:
+            print(f"  [Step {step}] {stage} done in {elapsed:.1f}s")
+        else:
+            print(f"  [Step {step}] {stage} failed after {elapsed:.1f}s: {error}")
+        if progress:
+            progress(stage, step, "done" if error is None else "failed")
+
+    return on_start, on_finish
+
+
+def _skip_stage(progress, stage: str, message: str):
+    """Print the step banner for a stage that doesn't apply to this run."""
+    step, _ = STAGES[stage]
+    print(f"\n[Step {step}] {message}")
+    if progress:
+        progress(stage, step, "skipped")
+
+
+def _render_video(images_dir: str, output_path: str, format_type: str, inputs: dict) -> str:
+    """CPU-bound video stage; module-level so it can run in the process pool."""
+    return create_video(
+        images_dir=images_dir,
+        audio_path=inputs["master"]["path"],
+        output_path=output_path,
+        format_type=format_type,
+        renderer=RENDERER,
+        # The mastered track is already AAC at the profile's bitrate
+        copy_audio=True,
+        # Subtitles are burned in here only in single-pass mode (the stage
+        # then depends on transcribe)
+        subtitles_path=_subtitles_source(inputs) if "transcribe" in inputs else None,
+        timeline_path=inputs["timeline"]["path"],
+    )
+
+
+def _subtitles_source(inputs: dict) -> str:
+    """
+    The karaoke captions, else the Whisper transcript, else the cues
+    written by the timeline stage.
+    """
+    timeline = inputs["timeline"]
+    return timeline.get("ass") or (inputs["transcribe"] or {}).get("srt") or timeline["srt"]
+
+
+def _frames_move() -> bool:
+    """Whether the render has motion or transitions (encoded with a different x264 tune)."""
+    return RENDERER != "moviepy" and (motion.MOTION != "none" or transitions.TRANSITION != "none")
+
+
+def _cache_params(topic: str, format_type: str, combined_llm: bool, single_pass: bool) -> dict:
+    """Inputs and settings that determine each cacheable stage's output."""
+    params = {
+        "script": {
+            "topic": topic,
+            "format_type": format_type,
+            "model": GEMINI_MODEL,
+            "combined": combined_llm,
+        },
+        "scenes": {"model": GEMINI_MODEL},
+        "metadata": {"topic": topic, "model": GEMINI_MODEL},
+        "voice": {"voice": VOICE},
+        "master": {
+            "loudness": audio.LOUDNESS,
+            "true_peak": audio.TRUE_PEAK,
+            "silence_threshold": audio.SILENCE_THRESHOLD,
+            "max_silence": audio.MAX_SILENCE,
+            "music": choose_music(seed=topic),
+            "music_loudness": audio.MUSIC_LOUDNESS,
+            "bitrate": get_profile(profile_name(format_type))["audio_bitrate"],
+        },
+        "visuals": {"topic": topic},
+        "timeline": {"karaoke": KARAOKE, "format_type": format_type},
+        "video": {
+            "format_type": format_type,
+            "resolution": RESOLUTIONS.get(format_type, RESOLUTIONS["landscape"]),
+            "profile": get_profile(profile_name(format_type), _frames_move()),
+            "renderer": RENDERER,
+            "motion": {
+                "type": motion.MOTION,
+                "zoom": motion.ZOOM,
+                "easing": motion.EASING,
+                "overscan": motion.OVERSCAN,
+            },
+            "transition": {"type": transitions.TRANSITION, "duration": transitions.DURATION},
+            "subtitle_style": SUBTITLE_STYLE if single_pass and not KARAOKE else None,
+        },
+        "transcribe": {"backend": WHISPER_BACKEND, "model": WHISPER_MODEL, "align": ALIGN_SCRIPT},
+        "subtitles": {
+            "style": SUBTITLE_STYLE,
+            "karaoke": KARAOKE,
+            "profile": get_profile(profile_name(format_type), _frames_move()),
+        },
+        "thumbnail": {
+            "format_type": format_type,
+            "size": THUMB_SIZES.get(format_type, THUMB_SIZES["landscape"]),
+        },
+    }
+    if single_pass:
+        # The subtitles stage just passes the video through; caching it would
+        # store a second copy of the render
+        del params["subtitles"]
+    return params
 
 
 def run_pipeline(
@@ -109,11 +298,39 @@ def run_pipeline(
     upload: bool = False,
     format_type: str = "landscape",
     privacy: str = "private",
-):
-    """Execute the full video-generation pipeline."""
+    run_id: str = None,
+    progress=None,
+    resume: bool = False,
+    use_cache: bool = stage_cache.ENABLED,
+    combined_llm: bool = COMBINED_LLM,
+    single_pass_subtitles: bool = SINGLE_PASS_SUBTITLES,
+) -> dict:
+    """
+    Execute the full video-generation pipeline.
+
+    Stages run as a dependency graph: once the script exists, metadata,
+    voiceover (then mastering) and scene extraction → image downloads run
+    concurrently, and transcription overlaps with the image downloads. Every completed stage is
+    checkpointed in runs/<run_id>/manifest.json.
+
+    progress: optional callback `progress(stage, step, status)` invoked as
+              each stage starts ("running") and ends ("done", "failed" or
+              "skipped").
+    resume:   reuse the checkpointed stages of an existing run_id and only
+              run what is still incomplete.
+    use_cache: reuse stage outputs from earlier runs with identical inputs
+              (set PIPELINE_CACHE=0 to disable by default).
+    combined_llm: ask Gemini for script, scenes and metadata in one
+              structured call, falling back to three calls if it fails
+              (set GEMINI_COMBINED=0 to disable by default).
+    single_pass_subtitles: transcribe first and burn the subtitles during
+              the video render rather than in a second encode
+              (set SUBTITLES_SINGLE_PASS=0 to disable by default).
+    Returns a dict with the run id, title, final video path and YouTube id.
+    """
 
     # Create run-scoped directories with timestamp
-    run_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+    run_id = run_id or datetime.now().strftime("%Y%m%d_%H%M%S")
     run_dir = os.path.join("runs", run_id)
     
     audio_dir = os.path.join(run_dir, "audio")
@@ -127,132 +344,294 @@ def run_pipeline(
     # Define file paths for this run
     script_file = os.path.join(run_dir, "script.txt")
     audio_file = os.path.join(audio_dir, "voice.mp3")
+    mastered_file = os.path.join(audio_dir, "voice.m4a")
     video_file = os.path.join(video_dir, "final.mp4")
-    srt_file = os.path.join(audio_dir, "voice.srt")
+    subtitled_file = os.path.join(video_dir, "final_subtitled.mp4")
+    timeline_file = os.path.join(run_dir, "timeline.json")
+    # Subtitles built from the timeline's words, by where their times came from
+    timeline_srt_files = {
+        "tts": os.path.join(audio_dir, "voice.tts.srt"),
+        "aligned": os.path.join(audio_dir, "voice.aligned.srt"),
+        "estimate": os.path.join(audio_dir, "voice.estimated.srt"),
+    }
+    aligned_words_file = os.path.join(audio_dir, "voice.aligned.json")
+    karaoke_file = os.path.join(audio_dir, "voice.karaoke.ass")
+    thumb_file = os.path.join(video_dir, "thumbnail.jpg")
+    is_short = (format_type == "portrait")
+
+    # Load checkpoints before anything is written for this run
+    previous = manifest.load_manifest(run_dir) if resume else None
+    run_manifest = previous or manifest.new_manifest(run_dir, {
+        "topic": topic,
+        "upload": upload,
+        "format_type": format_type,
+        "privacy": privacy,
+    })
 
     print("=" * 60)
-    print(f"  AI VIDEO PIPELINE")
+    print(f"  AI VIDEO PIPELINE{' (RESUMED)' if previous else ''}")
     print(f"  Run ID: {run_id}")
     print(f"  Topic: {topic}")
-    print(f"  Format: {format_type.upper()} ({'Shorts' if format_type == 'portrait' else 'Video'})")
+    print(f"  Format: {format_type.upper()} ({'Shorts' if is_short else 'Video'})")
     print(f"  Privacy: {privacy.upper()}")
     print("=" * 60)
 
     # ── Step 1: Generate Script ──────────────────────────────────────
-    print("\n[Step 1/8] Generating script...")
-    script_text = generate_script(topic, format_type=format_type)
-
-    # Save script to file
-    with open(script_file, "w", encoding="utf-8") as f:
-        f.write(script_text)
-    print(f"  Script saved → {script_file} ({len(script_text)} chars)")
+    def script_stage(inputs):
+        script = {}
+        if combined_llm:
+            # One structured call for script + scenes + metadata
+            try:
+                package = generate_package(topic, format_type=format_type)
+                script = {
+                    "text": package["script"],
+                    "scenes": package["scenes"],
+                    "segments": package["segments"],
+                    "metadata": package["metadata"],
+                }
+                print(f"  Script, {len(package['scenes'])} scenes and metadata from one Gemini call")
+            except Exception as e:
+                print(f"  Combined Gemini call failed ({e}), falling back to separate calls...")
+        if not script:
+            script = {"text": generate_script(topic, format_type=format_type)}
+
+        # Save script to file
+        with open(script_file, "w", encoding="utf-8") as f:
+            f.write(script["text"])
+        print(f"  Script saved → {script_file} ({len(script['text'])} chars)")
+        script["path"] = script_file
+        return script
 
     # ── Step 2: Split script into visual scenes ─────────────────────
-    print("\n[Step 2/8] Splitting script into visual scenes...")
-    scenes = extract_scenes(script_text)
-    for i, scene in enumerate(scenes, 1):
-        print(f"  Scene {i}: {scene}")
+    def scenes_stage(inputs):
+        scenes = inputs["script"].get("scenes") or extract_scenes(inputs["script"]["text"])
+        for i, scene in enumerate(scenes, 1):
+            print(f"  Scene {i}: {scene}")
+        return scenes
 
     # ── Step 3: Generate metadata (title, description, tags) ─────────
-    print("\n[Step 3/8] Generating YouTube metadata...")
-    metadata = generate_metadata(topic, script_text)
-    print(f"  Title: {metadata['title']}")
+    def metadata_stage(inputs):
+        metadata = inputs["script"].get("metadata") or generate_metadata(topic, inputs["script"]["text"])
+        print(f"  Title: {metadata['title']}")
+        return metadata
 
     # ── Step 4: Generate Voiceover ───────────────────────────────────
-    print("\n[Step 4/8] Generating voiceover...")
-    make_voice(script_text, output_path=audio_file)
+    def voice_stage(inputs):
+        words_file = make_voice(inputs["script"]["text"], output_path=audio_file)
+        return {"path": audio_file, "words": words_file}
+
+    # ── Step 4b: Master the voiceover (trim, loudness, music) ────────
+    def master_stage(inputs):
+        speech_end = None
+        words = load_words(inputs["voice"]["words"]) if inputs["voice"]["words"] else []
+        if words:
+            # Keep the pauses so the Edge TTS word times only shift by the
+            # leading trim
+            speech_end = words[-1]["end"]
+        return master_voice(
+            inputs["voice"]["path"],
+            mastered_file,
+            bitrate=get_profile(profile_name(format_type))["audio_bitrate"],
+            # Same topic → same track from the library
+            music_path=choose_music(seed=topic),
+            speech_end=speech_end,
+        )
 
     # ── Step 5: Fetch Visuals (one per scene) ────────────────────────
-    print("\n[Step 5/8] Fetching visuals from Pexels (per scene)...")
-    # Temporarily change to image_dir for downloads
-    original_images_dir = os.path.join("assets", "images")
-    if scenes:
-        images = fetch_images_for_scenes(scenes)
-    else:
-        images = fetch_images(topic)
-
-    if not images:
-        print("  WARNING: No images fetched. Using fallback.")
-        images = fetch_images("nature landscape")
-    
-    # Move images to run-scoped directory
-    moved_images = []
-    for img in images:
-        if os.path.exists(img):
-            dest = os.path.join(image_dir, os.path.basename(img))
-            shutil.move(img, dest)
-            moved_images.append(dest)
-    images = moved_images
-
-    # ── Step 6: Create Video ─────────────────────────────────────────
-    print("\n[Step 6/8] Creating video...")
-    video_path = create_video(
-        images_dir=image_dir,
-        audio_path=audio_file,
-        output_path=video_file,
-        format_type=format_type
-    )
-
-    # ── Step 7: Subtitles ────────────────────────────────────────────
-    print("\n[Step 7/8] Generating subtitles...")
-    try:
-        srt_path = generate_srt(audio_path=audio_file, output_dir=audio_dir)
-        final_video_path = os.path.join(video_dir, "final_subtitled.mp4")
-        final_video = burn_subtitles(
-            video_input=video_file,
-            srt_path=srt_path,
-            video_output=final_video_path
+    def visuals_stage(inputs):
+        # Download straight into the run-scoped directory so parallel runs
+        # never share assets/images
+        scenes = inputs["scenes"]
+        if scenes:
+            images = fetch_images_for_scenes(scenes, output_dir=image_dir)
+        else:
+            images = fetch_images(topic, output_dir=image_dir)
+
+        if not images:
+            print("  WARNING: No images fetched. Using fallback.")
+            images = fetch_images("nature landscape", output_dir=image_dir)
+        return images
+
+    # ── Step 5b: Time each scene to the narration ───────────────────
+    def timeline_stage(inputs):
+        script = inputs["script"]
+        transcript = inputs["transcribe"] or {}
+        words, words_source = None, None
+        if inputs["voice"]["words"]:
+            # Mastering cut the leading silence, so every word moved earlier
+            words = load_words(inputs["voice"]["words"], offset=inputs["master"]["lead_trim"])
+            words_source = "tts"
+        elif transcript.get("words"):
+            # Aligned against the mastered audio already
+            words = load_words(transcript["words"])
+            words_source = "aligned"
+        timeline = build_timeline(
+            script["text"],
+            num_scenes=len(inputs["scenes"]),
+            duration=probe_duration(inputs["master"]["path"]),
+            segments=script.get("segments"),
+            srt_path=transcript.get("srt"),
+            words=words,
+            words_source=words_source,
+        )
+        save_timeline(timeline, timeline_file)
+        for scene in timeline["scenes"]:
+            print(f"  Scene {scene['index'] + 1}: {scene['start']:.1f}s → {scene['end']:.1f}s")
+
+        srt = None
+        if timeline["source"] in timeline_srt_files:
+            if timeline["source"] == "estimate":
+                print("  No word timings or transcript available — subtitles estimated from the script")
+            srt = write_srt(words_to_cues(timeline["words"]), timeline_srt_files[timeline["source"]])
+        # Word-by-word captions, whichever source timed the words
+        ass = words_to_ass(timeline["words"], karaoke_file, format_type) if KARAOKE else None
+        return {"path": timeline_file, "srt": srt, "ass": ass}
+
+    # ── Step 6: Create Video (CPU-bound → process pool) ──────────────
+    video_stage = partial(_render_video, image_dir, video_file, format_type)
+
+    # ── Step 7: Subtitles (before the render in single-pass mode,
+    #    otherwise alongside it followed by a second encode) ───────────
+    def transcribe_stage(inputs):
+        if inputs["voice"]["words"]:
+            # Edge TTS already reported when each word is spoken
+            print("  Using the Edge TTS word timings, Whisper not needed")
+            return None
+        if ALIGN_SCRIPT:
+            # We know what was said: only the timing is missing
+            try:
+                words = align_script(inputs["script"]["text"], inputs["master"]["path"])
+                print(f"  Aligned {len(words)} script words to the voiceover")
+                return {"srt": None, "words": save_words(words, aligned_words_file)}
+            except Exception as e:
+                print(f"  Script alignment failed ({e}), transcribing with Whisper...")
+        srt = generate_srt(audio_path=inputs["master"]["path"], output_dir=audio_dir)
+        return {"srt": srt, "words": None}
+
+    def subtitles_stage(inputs):
+        if single_pass_subtitles:
+            # Already burned in by the video stage
+            return inputs["video"]
+        return burn_subtitles(
+            video_input=inputs["video"],
+            srt_path=_subtitles_source(inputs),
+            video_output=subtitled_file,
+            profile=profile_name(format_type),
+            moving=_frames_move(),
         )
-    except Exception as e:
-        print(f"  Subtitle generation failed: {e}")
-        print("  Continuing without subtitles...")
-        final_video = video_path
 
     # ── Step 7b: Generate Thumbnail (skip for Shorts) ────────────────
-    thumbnail_path = None
-    if format_type == "landscape":
-        print("\n[Step 7b] Creating thumbnail...")
-        try:
-            thumb_path = os.path.join(video_dir, "thumbnail.jpg")
-            first_image = images[0] if images else None
-            thumbnail_path = create_thumbnail(
-                metadata["title"],
-                image_path=first_image,
-                output_path=thumb_path,
-                format_type=format_type
-            )
-        except Exception as e:
-            print(f"  Thumbnail generation failed: {e}")
-            thumbnail_path = None
-    else:
-        print("\n[Step 7b] Skipping thumbnail (not needed for Shorts).")
+    def thumbnail_stage(inputs):
+        # Use the image of the scene that stays on screen the longest
+        images = inputs["visuals"]
+        image = longest_scene_image(load_timeline(inputs["timeline"]["path"]), images) if images else None
+        return create_thumbnail(
+            inputs["metadata"]["title"],
+            image_path=image or (images[0] if images else None),
+            output_path=thumb_file,
+            format_type=format_type
+        )
 
     # ── Step 8: Upload to YouTube (optional) ─────────────────────────
+    def upload_stage(inputs):
+        metadata = inputs["metadata"]
+        video_id = upload_video(
+            video_path=inputs["subtitles"] or inputs["video"],
+            title=metadata["title"],
+            description=metadata["description"],
+            tags=metadata["tags"],
+            thumbnail_path=inputs.get("thumbnail"),
+            privacy=privacy,
+            is_short=is_short,
+        )
+        print(f"\n  YouTube URL: https://youtube.com/watch?v={video_id}")
+        return video_id
+
+    stages = [
+        Stage("script", script_stage),
+        Stage("scenes", scenes_stage, deps=["script"]),
+        Stage("metadata", metadata_stage, deps=["script"]),
+        Stage("voice", voice_stage, deps=["script"]),
+        Stage("master", master_stage, deps=["voice"]),
+        Stage("visuals", visuals_stage, deps=["scenes"]),
+        Stage("transcribe", transcribe_stage, deps=["script", "voice", "master"], optional=True),
+        Stage("timeline", timeline_stage, deps=["script", "scenes", "voice", "master", "transcribe"]),
+        Stage(
+            "video",
+            video_stage,
+            deps=["master", "visuals", "timeline"] + (["transcribe"] if single_pass_subtitles else []),
+            kind="cpu",
+        ),
+        Stage("subtitles", subtitles_stage, deps=["video", "transcribe", "timeline"], optional=True),
+    ]
+    if not is_short:
+        stages.append(
+            Stage("thumbnail", thumbnail_stage, deps=["metadata", "visuals", "timeline"], optional=True)
+        )
     if upload:
-        is_short = (format_type == "portrait")
-        print(f"\n[Step 8/8] Uploading to YouTube {'Shorts' if is_short else ''}...")
-        try:
-            video_id = upload_video(
-                video_path=final_video,
-                title=metadata["title"],
-                description=metadata["description"],
-                tags=metadata["tags"],
-                thumbnail_path=thumbnail_path,
-                privacy=privacy,
-                is_short=is_short,
-            )
-            print(f"\n  YouTube URL: https://youtube.com/watch?v={video_id}")
-        except Exception as e:
-            print(f"  Upload failed: {e}")
-            print("  Video saved locally — you can upload manually.")
-    else:
-        print("\n[Step 8/8] Skipping upload.")
+        upload_deps = ["video", "subtitles", "metadata"] + ([] if is_short else ["thumbnail"])
+        stages.append(Stage("upload", upload_stage, deps=upload_deps, optional=True))
+
+    # Serve stages from the content-addressed cache when their inputs match
+    # a previous run (upload is never cached)
+    if use_cache:
+        keys = stage_cache.stage_keys(
+            {stage.name: stage.deps for stage in stages},
+            _cache_params(topic, format_type, combined_llm, single_pass_subtitles),
+        )
+        for stage in stages:
+            if stage.name in keys:
+                stage.func = partial(
+                    stage_cache.cached_call, stage.name, keys[stage.name], run_dir, stage.func
+                )
+
+    # Reuse checkpointed stages (and everything they still feed) on resume
+    completed = {}
+    if previous:
+        completed = drop_invalidated(stages, manifest.completed_stages(run_dir, previous))
+        for stage in completed:
+            step, _ = STAGES[stage]
+            print(f"\n[Step {step}] {stage} restored from checkpoint.")
+            if progress:
+                progress(stage, step, "done")
+
+    on_start, report_finish = _stage_hooks(progress)
+
+    def on_finish(stage, result, error, elapsed):
+        report_finish(stage, result, error, elapsed)
+        if error is None:
+            manifest.record_stage(run_dir, run_manifest, stage, result)
 
-    # ── Cleanup (always, keep final video) ─────────────────────────
-    cleanup_generated_files(run_dir=run_dir, final_video=final_video)
+    try:
+        results = run_stages(stages, results=completed, on_start=on_start, on_finish=on_finish)
+    except Exception:
+        print(f"\n  Run failed — checkpoints kept. Resume with: python main.py --resume {run_id}")
+        raise
+
+    metadata = results["metadata"]
+    final_video = results["subtitles"]
+    if final_video is None:
+        print("\n  Subtitles unavailable — continuing without subtitles...")
+        final_video = results["video"]
+
+    thumbnail_path = results.get("thumbnail")
+    if is_short:
+        _skip_stage(progress, "thumbnail", "Skipping thumbnail (not needed for Shorts).")
+
+    video_id = results.get("upload")
+    if not upload:
+        _skip_stage(progress, "upload", "Skipping upload.")
+    elif video_id is None:
+        print("  Upload failed — video saved locally, you can upload manually.")
+
+    # ── Cleanup (keep final video; keep the run if the upload must be retried)
+    output_video = cleanup_generated_files(
+        run_dir=run_dir,
+        final_video=final_video,
+        keep_run_dir=upload and video_id is None,
+    )
 
     # ── Done ─────────────────────────────────────────────────────────
-    output_video = os.path.join("output", os.path.basename(final_video))
     print("\n" + "=" * 60)
     print("  PIPELINE COMPLETE")
     print(f"  Video  → {output_video}")
@@ -261,9 +640,29 @@ def run_pipeline(
     print(f"  Run ID → {run_id}")
     print("=" * 60)
 
+    return {
+        "run_id": run_id,
+        "title": metadata["title"],
+        "video": output_video,
+        "youtube_id": video_id,
+        "youtube_url": f"https://youtube.com/watch?v={video_id}" if video_id else None,
+    }
+
+
+def resume_pipeline(run_id: str, progress=None) -> dict:
+    """Resume an interrupted run from its first incomplete stage."""
+    previous = manifest.load_manifest(os.path.join("runs", run_id))
+    if previous is None:
+        raise FileNotFoundError(f"No checkpoint found for run '{run_id}' in runs/")
+    return run_pipeline(**previous["params"], run_id=run_id, progress=progress, resume=True)
+
 
 if __name__ == "__main__":
     inputs = get_inputs()
+    if "resume" in inputs:
+        resume_pipeline(inputs["resume"])
+        sys.exit(0)
+
     TOPIC = inputs["topic"]
     FORMAT = inputs["format"]      # "short" or "video"
     UPLOAD = inputs["upload"]      # True / False
@@ -276,4 +675,10 @@ if __name__ == "__main__":
     # Map format choice to format_type for run_pipeline
     format_type = "portrait" if FORMAT == "short" else "landscape"
 
-    run_pipeline(TOPIC, upload=UPLOAD, format_type=format_type, privacy=PRIVACY)
+    run_pipeline(
+        TOPIC,
+        upload=UPLOAD,
+        format_type=format_type,
+        privacy=PRIVACY,
+        run_id=inputs["run_id"],
+    )
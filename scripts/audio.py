@@ -0,0 +1,231 @@
+"""
+Audio mastering — turns the raw Edge TTS voiceover into the final soundtrack.
+One streaming ffmpeg filtergraph trims the silence Edge TTS leaves around
+the speech, normalizes the loudness (EBU R128), optionally mixes in a
+background music bed that ducks under the voice and encodes AAC. The video
+renders then copy this track instead of re-encoding the mp3.
+
+Music comes from a local library (assets/audio/music). Each track is
+decoded, resampled and loudness-normalized once into a PCM stem under
+cache/music, so mixing it into a run only streams the stem for as long as
+the narration lasts.
+"""
+
+import os
+import re
+import json
+import hashlib
+import subprocess
+
+from scripts.media import FFMPEG, run_ffmpeg
+
+# Integrated loudness target in LUFS; YouTube plays everything back at -14
+LOUDNESS = float(os.getenv("AUDIO_LOUDNESS", "-14"))
+TRUE_PEAK = float(os.getenv("AUDIO_TRUE_PEAK", "-1.5"))  # dBTP
+# Anything quieter than this counts as silence
+SILENCE_THRESHOLD = os.getenv("AUDIO_SILENCE_THRESHOLD", "-50dB")
+# Pauses (and the tail) longer than this many seconds are shortened to it;
+# with TTS word timings only the tail is, so the timings stay valid
+MAX_SILENCE = float(os.getenv("AUDIO_MAX_SILENCE", "0.75"))
+# Background music: "" (none), "auto" (a library track picked per topic),
+# a track name from MUSIC_DIR or a file path
+MUSIC = os.getenv("BACKGROUND_MUSIC", "")
+MUSIC_DIR = os.getenv("MUSIC_DIR", os.path.join("assets", "audio", "music"))
+MUSIC_CACHE_DIR = os.getenv("MUSIC_CACHE_DIR", os.path.join("cache", "music"))
+# Loudness of the music bed in LUFS (the voice sits at LOUDNESS above it)
+MUSIC_LOUDNESS = float(os.getenv("MUSIC_LOUDNESS", "-32"))
+MUSIC_EXTENSIONS = (".mp3", ".m4a", ".aac", ".wav", ".flac", ".ogg")
+SAMPLE_RATE = 48000
+
+_SILENCE_RE = re.compile(r"silence_(start|end): (-?\d+(?:\.\d+)?)")
+
+
+def _lead_silence(stderr: str) -> float:
+    """Length of the silence at the very start, from silencedetect's log."""
+    events = _SILENCE_RE.findall(stderr)
+    if len(events) >= 2 and events[0][0] == "start" and float(events[0][1]) <= 0.01:
+        return float(events[1][1])
+    return 0.0
+
+
+def music_library(music_dir: str = MUSIC_DIR) -> list[str]:
+    """Audio files in the music library, sorted by name."""
+    if not os.path.isdir(music_dir):
+        return []
+    return sorted(
+        os.path.join(music_dir, name)
+        for name in os.listdir(music_dir)
+        if name.lower().endswith(MUSIC_EXTENSIONS)
+    )
+
+
+def choose_music(choice: str = MUSIC, seed: str = "", music_dir: str = MUSIC_DIR) -> str | None:
+    """
+    Resolve BACKGROUND_MUSIC to a file. "auto" picks a library track from
+    `seed` (e.g. the topic), so the same topic always gets the same track.
+    Returns None when no music is wanted or the library is empty.
+    """
+    if not choice:
+        return None
+    if choice == "auto":
+        tracks = music_library(music_dir)
+        if not tracks:
+            print(f"[Audio] No music found in {music_dir}, continuing without music.")
+            return None
+        index = int(hashlib.sha256(seed.encode("utf-8")).hexdigest(), 16) % len(tracks)
+        return tracks[index]
+    if os.path.isfile(choice):
+        return choice
+    for path in music_library(music_dir):
+        if choice in (os.path.basename(path), os.path.splitext(os.path.basename(path))[0]):
+            return path
+    raise FileNotFoundError(f"Music track '{choice}' not found (looked in {music_dir})")
+
+
+def _measure_loudness(path: str) -> dict:
+    """First loudnorm pass: the track's measured loudness statistics."""
+    result = subprocess.run(
+        [FFMPEG, "-hide_banner", "-nostats", "-i", path,
+         "-af", "loudnorm=print_format=json", "-f", "null", "-"],
+        capture_output=True,
+        text=True,
+    )
+    blocks = re.findall(r"\{[^{}]*\}", result.stderr)
+    if result.returncode != 0 or not blocks:
+        raise RuntimeError(f"Could not measure the loudness of {path}")
+    return json.loads(blocks[-1])
+
+
+def prepare_music(path: str, loudness: float = MUSIC_LOUDNESS) -> str:
+    """
+    Decode a music track into a cached stereo PCM stem at SAMPLE_RATE,
+    normalized to `loudness` with two-pass (linear) loudnorm so the music's
+    own dynamics are kept. Returns the stem's path in MUSIC_CACHE_DIR.
+    """
+    with open(path, "rb") as f:
+        digest = hashlib.sha256(f.read()).hexdigest()[:32]
+    stem_path = os.path.join(MUSIC_CACHE_DIR, f"{digest}_{SAMPLE_RATE}_{loudness:g}.wav")
+    if os.path.exists(stem_path):
+        return stem_path
+
+    print(f"[Audio] Preparing music stem for {os.path.basename(path)}...")
+    measured = _measure_loudness(path)
+    loudnorm = (
+        f"loudnorm=I={loudness}:TP=-3:LRA=20:linear=true"
+        f":measured_I={measured['input_i']}:measured_TP={measured['input_tp']}"
+        f":measured_LRA={measured['input_lra']}:measured_thresh={measured['input_thresh']}"
+        f":offset={measured['target_offset']}"
+    )
+    os.makedirs(MUSIC_CACHE_DIR, exist_ok=True)
+    tmp_path = f"{stem_path}.tmp{os.getpid()}.wav"
+    run_ffmpeg([
+        "-i", path,
+        "-vn",
+        "-af", f"{loudnorm},aresample={SAMPLE_RATE},aformat=channel_layouts=stereo",
+        "-c:a", "pcm_s16le",
+        tmp_path,
+    ], progress=False)
+    os.replace(tmp_path, stem_path)
+    return stem_path
+
+
+def _voice_chain(max_silence: float, speech_end: float = None) -> str:
+    """
+    Measure the leading silence, then remove it and cap longer pauses, or,
+    when `speech_end` is known, keep the pauses and cut the tail there.
+    """
+    filters = [f"silencedetect=n={SILENCE_THRESHOLD}:d=0.01"]
+    trim = f"silenceremove=start_periods=1:start_threshold={SILENCE_THRESHOLD}"
+    if speech_end is None:
+        # stop_duration is the silence kept of each pause; a non-zero
+        # stop_silence would be kept on top of it
+        trim += (
+            f":stop_periods=-1:stop_duration={max_silence}:stop_silence=0"
+            f":stop_threshold={SILENCE_THRESHOLD}"
+        )
+    else:
+        filters.append(f"atrim=end={speech_end + max_silence:.3f}")
+    filters += [trim, f"aformat=sample_rates={SAMPLE_RATE}:channel_layouts=stereo"]
+    return ",".join(filters)
+
+
+def master_voice(
+    voice_path: str,
+    output_path: str,
+    bitrate: str = "192k",
+    music_path: str = None,
+    music_loudness: float = MUSIC_LOUDNESS,
+    loudness: float = LOUDNESS,
+    max_silence: float = MAX_SILENCE,
+    speech_end: float = None,
+) -> dict:
+    """
+    Master the voiceover into an AAC track at `output_path` (.m4a).
+
+    music_path:   background music (see choose_music), looped under the
+                  voice and ducked (sidechain-compressed) while the
+                  narrator speaks
+    music_loudness: loudness of the music bed before ducking, in LUFS
+    loudness:     integrated loudness target in LUFS
+    max_silence:  pauses longer than this (seconds) are shortened to it
+    speech_end:   where the speech ends in the raw voice (e.g. the last TTS
+                  word boundary); pauses are then left alone, so that only
+                  the leading trim moves timestamps, and the tail is cut
+                  `max_silence` after it
+    Returns {"path", "lead_trim"}: lead_trim is the seconds of silence cut
+    from the start, i.e. how far every timestamp in the raw voice moved
+    (the only change to them when speech_end is given).
+    """
+    if not os.path.exists(voice_path):
+        raise FileNotFoundError(f"Voice file not found: {voice_path}")
+    if music_path and not os.path.exists(music_path):
+        raise FileNotFoundError(f"Music file not found: {music_path}")
+
+    # loudnorm resamples to 192 kHz internally; bring it back down for AAC
+    voice = (
+        f"[0:a]{_voice_chain(max_silence, speech_end)},"
+        f"loudnorm=I={loudness}:TP={TRUE_PEAK}:LRA=11,aresample={SAMPLE_RATE}"
+    )
+    inputs = ["-i", voice_path]
+    if music_path:
+        # The stem is already at the right rate and loudness: loop it and
+        # read only as much as the narration needs
+        inputs += ["-stream_loop", "-1", "-i", prepare_music(music_path, music_loudness)]
+        peak = 10 ** (TRUE_PEAK / 20)
+        graph = ";".join([
+            f"{voice},asplit=2[voice][key]",
+            "[1:a][key]sidechaincompress=threshold=0.02:ratio=8:attack=20:release=400[ducked]",
+            f"[voice][ducked]amix=inputs=2:duration=first:normalize=0,"
+            f"alimiter=limit={peak:.3f}:level=disabled[out]",
+        ])
+    else:
+        graph = f"{voice}[out]"
+
+    # Run ffmpeg directly (not run_ffmpeg) to read silencedetect's log lines
+    result = subprocess.run(
+        [
+            FFMPEG, "-hide_banner", "-nostats", "-y",
+            *inputs,
+            "-filter_complex", graph,
+            "-map", "[out]",
+            "-c:a", "aac", "-b:a", bitrate,
+            "-movflags", "+faststart",
+            output_path,
+        ],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Audio mastering failed: {result.stderr.strip()[-500:]}")
+
+    lead_trim = _lead_silence(result.stderr)
+    print(f"[Audio] Mastered voice → {output_path} "
+          f"({loudness:g} LUFS, {lead_trim:.2f}s leading silence trimmed"
+          f"{', music: ' + os.path.basename(music_path) if music_path else ''})")
+    return {"path": output_path, "lead_trim": lead_trim}
+
+
+if __name__ == "__main__":
+    # Pre-encode every track in the music library
+    for track in music_library():
+        print(f"{track} → {prepare_music(track)}")
@@ -0,0 +1,92 @@
+"""
+Encoding profiles — named x264 settings for the slideshow renders.
+Our videos are mostly still images, so every profile uses `-tune
+stillimage` and a long keyframe interval; they differ in how much encode
+time they spend for a smaller file. Renders with Ken Burns motion or
+transitions use MOTION_TUNE instead, since stillimage tuning smears moving
+frames.
+"""
+
+import os
+
+# preset/crf:      x264 speed vs size trade-off (lower crf = higher quality)
+# fps:             output frame rate
+# render_fps:      frames actually rendered per second; ffmpeg duplicates
+#                  them up to `fps`, which costs almost nothing to encode
+#                  for static images (None = render every output frame)
+# keyint_seconds:  maximum distance between keyframes
+PROFILES = {
+    "upload-quality": {
+        "preset": "slow",
+        "crf": 18,
+        "tune": "stillimage",
+        "keyint_seconds": 10,
+        "fps": 24,
+        "render_fps": None,
+        "pix_fmt": "yuv420p",
+        "audio_bitrate": "192k",
+    },
+    "shorts-fast": {
+        "preset": "veryfast",
+        "crf": 21,
+        "tune": "stillimage",
+        "keyint_seconds": 5,
+        "fps": 30,
+        "render_fps": None,
+        "pix_fmt": "yuv420p",
+        "audio_bitrate": "160k",
+    },
+    "preview": {
+        "preset": "ultrafast",
+        "crf": 30,
+        "tune": "stillimage",
+        "keyint_seconds": 10,
+        "fps": 24,
+        "render_fps": 6,
+        "pix_fmt": "yuv420p",
+        "audio_bitrate": "96k",
+    },
+}
+
+# Profile used for each format unless VIDEO_PROFILE overrides it
+DEFAULT_PROFILES = {
+    "landscape": "upload-quality",
+    "portrait": "shorts-fast",
+}
+
+PROFILE = os.getenv("VIDEO_PROFILE", "")
+MOTION_TUNE = "film"  # replaces the profile's tune when the frames move
+
+
+def profile_name(format_type: str, name: str = None) -> str:
+    """Resolve the profile to use: explicit name, VIDEO_PROFILE, then per-format default."""
+    return name or PROFILE or DEFAULT_PROFILES.get(format_type, "upload-quality")
+
+
+def get_profile(name: str, moving: bool = False) -> dict:
+    """
+    Look up a profile by name; raises ValueError for unknown names.
+    moving: the video has motion or transitions, so use MOTION_TUNE.
+    """
+    if name not in PROFILES:
+        raise ValueError(f"Unknown encoding profile '{name}' (expected one of {', '.join(PROFILES)})")
+    if moving:
+        return {**PROFILES[name], "tune": MOTION_TUNE}
+    return PROFILES[name]
+
+
+def x264_args(profile: dict) -> list[str]:
+    """ffmpeg output options for the video stream."""
+    return [
+        "-c:v", "libx264",
+        "-preset", profile["preset"],
+        "-crf", str(profile["crf"]),
+        "-tune", profile["tune"],
+        "-g", str(int(profile["keyint_seconds"] * profile["fps"])),
+        "-pix_fmt", profile["pix_fmt"],
+    ]
+
+
+def audio_args(profile: dict) -> list[str]:
+    """ffmpeg output options for the audio stream."""
+    return ["-c:a", "aac", "-b:a", profile["audio_bitrate"]]
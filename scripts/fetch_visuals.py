@@ -3,18 +3,68 @@ Step 4 — Fetch Visuals from Pexels (free API).
 Downloads high-quality stock images to use as video backgrounds.
 """
 
-import requests
 import os
+import asyncio
+import sqlite3
 from dotenv import load_dotenv
 
+from scripts import http_client, pexels_cache
+
 load_dotenv()
 
 IMAGES_DIR = os.path.join("assets", "images")
+PEXELS_SEARCH_URL = "https://api.pexels.com/v1/search"
+MAX_CONCURRENT_FETCHES = int(os.getenv("PEXELS_CONCURRENCY", "6"))
+
+
+def _download(url: str, filepath: str):
+    """Stream an image straight to disk instead of holding it in memory."""
+    http_client.download(url, filepath, timeout=30)
+
+
+def _search_photos(query: str, headers: dict, per_page: int = 1) -> list[dict]:
+    """Return landscape Pexels results for `query` (possibly empty), via the local cache."""
+    if pexels_cache.ENABLED:
+        photos = pexels_cache.get_search(query, "landscape", per_page)
+        if photos is not None:
+            return photos
+
+    params = {"query": query, "per_page": per_page, "orientation": "landscape"}
+    response = http_client.get(PEXELS_SEARCH_URL, headers=headers, params=params, timeout=30)
+    response.raise_for_status()
+    photos = response.json().get("photos", [])
+
+    if pexels_cache.ENABLED:
+        pexels_cache.put_search(query, "landscape", per_page, photos)
+    return photos
+
+
+def _save_photo(photo: dict, filepath: str):
+    """Write a Pexels photo to `filepath`, from the local cache when possible."""
+    if pexels_cache.ENABLED and pexels_cache.get_image(photo["id"], filepath):
+        return
+    _download(photo["src"]["large"], filepath)  # Higher quality than 'medium'
+    if pexels_cache.ENABLED:
+        try:
+            pexels_cache.put_image(photo["id"], filepath)
+        except (OSError, sqlite3.Error) as e:
+            # The image is on disk; only caching it failed
+            print(f"[Visuals] Could not cache photo {photo['id']}: {e}")
 
 
-def fetch_images(query: str, count: int = 6) -> list[str]:
+def _print_cache_stats():
+    if pexels_cache.ENABLED:
+        st = pexels_cache.stats()
+        print(
+            f"[Visuals] Cache: searches {st['search_hit']} hit / {st['search_miss']} miss, "
+            f"images {st['image_hit']} hit / {st['image_miss']} miss "
+            f"({st['images']} files, {st['bytes'] / 1e6:.0f} MB)"
+        )
+
+
+def fetch_images(query: str, count: int = 6, output_dir: str = IMAGES_DIR) -> list[str]:
     """
-    Search Pexels for `query` and download `count` images.
+    Search Pexels for `query` and download `count` images into `output_dir`.
     Returns list of saved file paths.
     """
     api_key = os.getenv("PEXELS_API_KEY")
@@ -22,37 +72,26 @@ def fetch_images(query: str, count: int = 6) -> list[str]:
         raise RuntimeError("PEXELS_API_KEY not found in environment variables.")
 
     headers = {"Authorization": api_key}
-    url = "https://api.pexels.com/v1/search"
-    params = {"query": query, "per_page": count, "orientation": "landscape"}
-
-    response = requests.get(url, headers=headers, params=params, timeout=30)
-    response.raise_for_status()
-
-    photos = response.json().get("photos", [])
+    photos = _search_photos(query, headers, per_page=count)
     if not photos:
         print(f"[Visuals] No photos found for '{query}', trying fallback...")
         # Fallback to a generic search
-        params["query"] = "nature landscape"
-        response = requests.get(url, headers=headers, params=params, timeout=30)
-        response.raise_for_status()
-        photos = response.json().get("photos", [])
+        photos = _search_photos("nature landscape", headers, per_page=count)
 
-    os.makedirs(IMAGES_DIR, exist_ok=True)
+    os.makedirs(output_dir, exist_ok=True)
     saved = []
 
     for i, photo in enumerate(photos[:count]):
-        img_url = photo["src"]["large"]  # Higher quality than 'medium'
-        img_data = requests.get(img_url, timeout=30).content
-        filepath = os.path.join(IMAGES_DIR, f"img{i}.jpg")
-        with open(filepath, "wb") as f:
-            f.write(img_data)
+        filepath = os.path.join(output_dir, f"img{i}.jpg")
+        _save_photo(photo, filepath)
         saved.append(filepath)
         print(f"[Visuals] Downloaded img{i}.jpg  ({photo['src']['large']})")
 
+    _print_cache_stats()
     return saved
 
 
-def fetch_images_for_keywords(keywords: list[str]) -> list[str]:
+def fetch_images_for_keywords(keywords: list[str], output_dir: str = IMAGES_DIR) -> list[str]:
     """
     Download one image per keyword (up to 6 total).
     Gives more variety than searching a single term.
@@ -62,22 +101,15 @@ def fetch_images_for_keywords(keywords: list[str]) -> list[str]:
         raise RuntimeError("PEXELS_API_KEY not found in environment variables.")
 
     headers = {"Authorization": api_key}
-    url = "https://api.pexels.com/v1/search"
-    os.makedirs(IMAGES_DIR, exist_ok=True)
+    os.makedirs(output_dir, exist_ok=True)
     saved = []
 
     for i, keyword in enumerate(keywords[:6]):
-        params = {"query": keyword, "per_page": 1, "orientation": "landscape"}
         try:
-            response = requests.get(url, headers=headers, params=params, timeout=30)
-            response.raise_for_status()
-            photos = response.json().get("photos", [])
+            photos = _search_photos(keyword, headers)
             if photos:
-                img_url = photos[0]["src"]["large"]
-                img_data = requests.get(img_url, timeout=30).content
-                filepath = os.path.join(IMAGES_DIR, f"img{i}.jpg")
-                with open(filepath, "wb") as f:
-                    f.write(img_data)
+                filepath = os.path.join(output_dir, f"img{i}.jpg")
+                _save_photo(photos[0], filepath)
                 saved.append(filepath)
                 print(f"[Visuals] img{i}.jpg ← '{keyword}'")
             else:
@@ -85,53 +117,67 @@ def fetch_images_for_keywords(keywords: list[str]) -> list[str]:
         except Exception as e:
             print(f"[Visuals] Error fetching '{keyword}': {e}")
 
+    _print_cache_stats()
     return saved
 
 
-def fetch_images_for_scenes(scene_descriptions: list[str]) -> list[str]:
-    """
-    Download one image per scene description.
-    Each description comes from Gemini's scene breakdown of the script,
-    so the images directly match the video's visual narrative.
-    """
-    api_key = os.getenv("PEXELS_API_KEY")
-    if not api_key:
-        raise RuntimeError("PEXELS_API_KEY not found in environment variables.")
-
-    headers = {"Authorization": api_key}
-    url = "https://api.pexels.com/v1/search"
-    os.makedirs(IMAGES_DIR, exist_ok=True)
-    saved = []
-
-    for i, description in enumerate(scene_descriptions):
-        params = {"query": description, "per_page": 1, "orientation": "landscape"}
+async def _fetch_scene(
+    i: int,
+    description: str,
+    headers: dict,
+    output_dir: str,
+    semaphore: asyncio.Semaphore,
+) -> str | None:
+    """Search and download the image for one scene; None if nothing was found."""
+    async with semaphore:
         try:
-            response = requests.get(url, headers=headers, params=params, timeout=30)
-            response.raise_for_status()
-            photos = response.json().get("photos", [])
+            photos = await asyncio.to_thread(_search_photos, description, headers)
 
             if not photos:
                 # Simplify the query by taking the first 3 words as fallback
                 short_query = " ".join(description.split()[:3])
                 print(f"[Visuals] No result for scene {i+1}, retrying with '{short_query}'...")
-                params["query"] = short_query
-                response = requests.get(url, headers=headers, params=params, timeout=30)
-                response.raise_for_status()
-                photos = response.json().get("photos", [])
+                photos = await asyncio.to_thread(_search_photos, short_query, headers)
 
-            if photos:
-                img_url = photos[0]["src"]["large"]
-                img_data = requests.get(img_url, timeout=30).content
-                filepath = os.path.join(IMAGES_DIR, f"img{i}.jpg")
-                with open(filepath, "wb") as f:
-                    f.write(img_data)
-                saved.append(filepath)
-                print(f"[Visuals] img{i}.jpg ← Scene {i+1}: '{description}'")
-            else:
+            if not photos:
                 print(f"[Visuals] No image found for scene {i+1}: '{description}', skipping.")
+                return None
+
+            # Named after the scene index so create_video keeps narrative order
+            filepath = os.path.join(output_dir, f"img{i}.jpg")
+            await asyncio.to_thread(_save_photo, photos[0], filepath)
+            print(f"[Visuals] img{i}.jpg ← Scene {i+1}: '{description}'")
+            return filepath
         except Exception as e:
             print(f"[Visuals] Error fetching scene {i+1} '{description}': {e}")
+            return None
+
 
+async def _fetch_scenes(scene_descriptions: list[str], headers: dict, output_dir: str) -> list[str]:
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_FETCHES)
+    paths = await asyncio.gather(*(
+        _fetch_scene(i, description, headers, output_dir, semaphore)
+        for i, description in enumerate(scene_descriptions)
+    ))
+    return [path for path in paths if path]
+
+
+def fetch_images_for_scenes(scene_descriptions: list[str], output_dir: str = IMAGES_DIR) -> list[str]:
+    """
+    Download one image per scene description.
+    Each description comes from Gemini's scene breakdown of the script,
+    so the images directly match the video's visual narrative.
+    All scene searches and downloads run concurrently (bounded by
+    PEXELS_CONCURRENCY); results keep the scene order (img0.jpg, img1.jpg, ...).
+    """
+    api_key = os.getenv("PEXELS_API_KEY")
+    if not api_key:
+        raise RuntimeError("PEXELS_API_KEY not found in environment variables.")
+
+    headers = {"Authorization": api_key}
+    os.makedirs(output_dir, exist_ok=True)
+    saved = asyncio.run(_fetch_scenes(scene_descriptions, headers, output_dir))
+    _print_cache_stats()
     return saved
 
 
@@ -3,19 +3,24 @@ Step 2 — Script Generation using Google Gemini API (free tier).
 Generates a 60-90 second YouTube script for a given topic.
 """
 
-import requests
 import os
 import re
+import json
 from dotenv import load_dotenv
 
+from scripts import http_client
+
 load_dotenv()
 
+GEMINI_MODEL = "gemini-2.5-flash"
+GEMINI_URL = f"https://generativelanguage.googleapis.com/v1beta/models/{GEMINI_MODEL}:generateContent"
 
-def generate_script(topic: str, format_type: str = "landscape") -> str:
-    """Call Gemini API to generate a short YouTube script."""
+
+def _script_brief(topic: str, format_type: str) -> str:
+    """Length, tone and style requirements for the narration of a video."""
     if format_type == "portrait":
         # Shorts: under 60 seconds → ~30-45 second script
-        prompt = (
+        return (
             f"Write a 30-45 second YouTube Shorts video script.\n"
             f"Topic: {topic}\n"
             f"Requirements:\n"
@@ -25,26 +30,28 @@ def generate_script(topic: str, format_type: str = "landscape") -> str:
             f"- Use very short sentences suitable for voiceover\n"
             f"- Keep it concise — this is a Short, not a full video\n"
             f"- Do NOT include stage directions, timestamps, or formatting marks\n"
-            f"- Just return the spoken narration text"
-        )
-    else:
-        prompt = (
-            f"Write a 60-90 second YouTube video script.\n"
-            f"Topic: {topic}\n"
-            f"Requirements:\n"
-            f"- Clear, engaging, and educational tone\n"
-            f"- Include a hook in the first 5 seconds\n"
-            f"- Use short sentences suitable for voiceover\n"
-            f"- Do NOT include stage directions, timestamps, or formatting marks\n"
-            f"- Just return the spoken narration text"
         )
+    return (
+        f"Write a 60-90 second YouTube video script.\n"
+        f"Topic: {topic}\n"
+        f"Requirements:\n"
+        f"- Clear, engaging, and educational tone\n"
+        f"- Include a hook in the first 5 seconds\n"
+        f"- Use short sentences suitable for voiceover\n"
+        f"- Do NOT include stage directions, timestamps, or formatting marks\n"
+    )
+
+
+def generate_script(topic: str, format_type: str = "landscape") -> str:
+    """Call Gemini API to generate a short YouTube script."""
+    prompt = _script_brief(topic, format_type) + "- Just return the spoken narration text"
 
     api_key = os.getenv("GEMINI_API_KEY")
     if not api_key:
         raise RuntimeError("GEMINI_API_KEY not found in environment variables.")
 
-    url = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash:generateContent"
-    response = requests.post(
+    url = GEMINI_URL
+    response = http_client.post(
         url,
         params={"key": api_key},
         json={"contents": [{"parts": [{"text": prompt}]}]},
@@ -61,6 +68,130 @@ def generate_script(topic: str, format_type: str = "landscape") -> str:
     return script_text.strip()
 
 
+# Structured-output schema for generate_package (Gemini's OpenAPI subset)
+PACKAGE_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "script": {"type": "STRING"},
+        "scenes": {
+            "type": "ARRAY",
+            "items": {
+                "type": "OBJECT",
+                "properties": {
+                    "segment": {"type": "STRING"},
+                    "query": {"type": "STRING"},
+                },
+                "required": ["segment", "query"],
+            },
+        },
+        "title": {"type": "STRING"},
+        "description": {"type": "STRING"},
+        "tags": {"type": "ARRAY", "items": {"type": "STRING"}},
+    },
+    "required": ["script", "scenes", "title", "description", "tags"],
+    "propertyOrdering": ["script", "scenes", "title", "description", "tags"],
+}
+
+
+def _validate_package(data, num_scenes: int) -> dict:
+    """Check a generate_package response and normalise it; raises ValueError."""
+    if not isinstance(data, dict):
+        raise ValueError("response is not a JSON object")
+
+    script_text = data.get("script")
+    if not isinstance(script_text, str) or not script_text.strip():
+        raise ValueError("missing narration script")
+
+    scenes = data.get("scenes")
+    if not isinstance(scenes, list) or not scenes:
+        raise ValueError("missing scenes")
+    segments, queries = [], []
+    for scene in scenes[:num_scenes]:
+        if not isinstance(scene, dict):
+            raise ValueError(f"malformed scene: {scene!r}")
+        segment = str(scene.get("segment", "")).strip()
+        query = str(scene.get("query", "")).strip()
+        if not segment or not query:
+            raise ValueError(f"incomplete scene: {scene!r}")
+        segments.append(segment)
+        queries.append(query)
+
+    title = data.get("title")
+    if not isinstance(title, str) or not title.strip():
+        raise ValueError("missing title")
+
+    tags = data.get("tags")
+    if not isinstance(tags, list):
+        raise ValueError("tags must be a list")
+
+    return {
+        "script": script_text.strip(),
+        "scenes": queries,
+        "segments": segments,
+        "metadata": {
+            "title": title.strip()[:100],  # YouTube's hard limit
+            "description": str(data.get("description", "")).strip(),
+            "tags": [str(t).strip() for t in tags if str(t).strip()][:15],
+        },
+    }
+
+
+def generate_package(topic: str, format_type: str = "landscape", num_scenes: int = 6) -> dict:
+    """
+    Generate the narration script, its visual scenes and the YouTube metadata
+    with a single Gemini call using structured JSON output.
+
+    Returns {"script": str, "scenes": [search phrase, ...],
+             "segments": [script excerpt per scene, ...],
+             "metadata": {"title", "description", "tags"}}.
+    Raises RuntimeError/ValueError if the response is unusable — callers fall
+    back to generate_script + extract_scenes + generate_metadata.
+    """
+    prompt = (
+        _script_brief(topic, format_type)
+        + f"\nReturn a JSON object with:\n"
+        f"- script: the spoken narration text only\n"
+        f"- scenes: exactly {num_scenes} objects in narration order, each with\n"
+        f"  - segment: the consecutive part of the script this scene covers (copied verbatim)\n"
+        f"  - query: a short (3-8 word) image search description that would find a good stock photo for it\n"
+        f"  Together the segments must cover the whole script.\n"
+        f"- title: a catchy YouTube title (max 70 chars)\n"
+        f"- description: a YouTube description (2-3 sentences + relevant hashtags)\n"
+        f"- tags: 8 relevant tags"
+    )
+
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        raise RuntimeError("GEMINI_API_KEY not found in environment variables.")
+
+    response = http_client.post(
+        GEMINI_URL,
+        params={"key": api_key},
+        json={
+            "contents": [{"parts": [{"text": prompt}]}],
+            "generationConfig": {
+                "responseMimeType": "application/json",
+                "responseSchema": PACKAGE_SCHEMA,
+            },
+        },
+        timeout=90,
+    )
+    response.raise_for_status()
+
+    data = response.json()
+    try:
+        raw = data["candidates"][0]["content"]["parts"][0]["text"]
+    except (KeyError, IndexError) as exc:
+        raise RuntimeError(f"Unexpected Gemini response: {data}") from exc
+
+    try:
+        package = json.loads(raw)
+    except json.JSONDecodeError as exc:
+        raise ValueError(f"Gemini returned invalid JSON: {exc}") from exc
+
+    return _validate_package(package, num_scenes)
+
+
 def extract_keywords(topic: str, script_text: str) -> list[str]:
     """Use Gemini to pull 6 vivid image-search keywords from the script."""
     prompt = (
@@ -72,8 +203,8 @@ def extract_keywords(topic: str, script_text: str) -> list[str]:
     )
 
     api_key = os.getenv("GEMINI_API_KEY")
-    url = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash:generateContent"
-    response = requests.post(
+    url = GEMINI_URL
+    response = http_client.post(
         url,
         params={"key": api_key},
         json={"contents": [{"parts": [{"text": prompt}]}]},
@@ -107,8 +238,8 @@ def extract_scenes(script_text: str, num_scenes: int = 6) -> list[str]:
     if not api_key:
         raise RuntimeError("GEMINI_API_KEY not found in environment variables.")
 
-    url = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash:generateContent"
-    response = requests.post(
+    url = GEMINI_URL
+    response = http_client.post(
         url,
         params={"key": api_key},
         json={"contents": [{"parts": [{"text": prompt}]}]},
@@ -120,7 +251,6 @@ def extract_scenes(script_text: str, num_scenes: int = 6) -> list[str]:
     raw = data["candidates"][0]["content"]["parts"][0]["text"].strip()
 
     # Parse JSON array from response (strip markdown fences if present)
-    import json
     raw = re.sub(r"^```(?:json)?\s*", "", raw)
     raw = re.sub(r"\s*```$", "", raw)
     try:
@@ -152,8 +282,8 @@ def generate_metadata(topic: str, script_text: str) -> dict:
     )
 
     api_key = os.getenv("GEMINI_API_KEY")
-    url = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash:generateContent"
-    response = requests.post(
+    url = GEMINI_URL
+    response = http_client.post(
         url,
         params={"key": api_key},
         json={"contents": [{"parts": [{"text": prompt}]}]},
@@ -1,26 +1,87 @@
 """
 Step 3 — Voiceover Generation using Edge TTS (Microsoft, free).
-Converts script text to high-quality speech audio.
+Converts script text to high-quality speech audio. The WordBoundary events
+Edge TTS streams alongside the audio are saved as well (voice.words.json),
+giving exact word timings for subtitles and scene timing without Whisper.
 """
 
 import edge_tts
 import asyncio
+import json
 import os
 
 VOICE = "en-IN-NeerjaNeural"  # Free, clear Indian-English voice
 OUTPUT_PATH = os.path.join("assets", "audio", "voice.mp3")
 
 
-async def _make_voice(text: str, output_path: str = OUTPUT_PATH, voice: str = VOICE):
-    """Async helper — synthesize speech and save to file."""
-    communicate = edge_tts.Communicate(text, voice=voice)
-    await communicate.save(output_path)
-    print(f"[Voice] Saved voiceover → {output_path}")
+# Edge TTS offsets and durations are in 100-nanosecond ticks
+_TICKS_PER_SECOND = 10_000_000
 
 
-def make_voice(text: str, output_path: str = OUTPUT_PATH, voice: str = VOICE):
-    """Public sync wrapper around the async Edge-TTS call."""
-    asyncio.run(_make_voice(text, output_path, voice))
+def words_path_for(audio_path: str) -> str:
+    """Where the word timings for `audio_path` are stored."""
+    return os.path.splitext(audio_path)[0] + ".words.json"
+
+
+async def _make_voice(text: str, output_path: str = OUTPUT_PATH, voice: str = VOICE) -> list[dict]:
+    """Async helper — synthesize speech, save it to file and collect word timings."""
+    try:
+        communicate = edge_tts.Communicate(text, voice=voice, boundary="WordBoundary")
+    except TypeError:
+        # edge-tts < 7 always reports word boundaries and has no option for it
+        communicate = edge_tts.Communicate(text, voice=voice)
+
+    words = []
+    with open(output_path, "wb") as f:
+        async for chunk in communicate.stream():
+            if chunk["type"] == "audio":
+                f.write(chunk["data"])
+            elif chunk["type"] == "WordBoundary":
+                start = chunk["offset"] / _TICKS_PER_SECOND
+                words.append({
+                    "word": chunk["text"],
+                    "start": round(start, 3),
+                    "end": round(start + chunk["duration"] / _TICKS_PER_SECOND, 3),
+                })
+    print(f"[Voice] Saved voiceover → {output_path} ({len(words)} word timings)")
+    return words
+
+
+def make_voice(text: str, output_path: str = OUTPUT_PATH, voice: str = VOICE) -> str | None:
+    """
+    Public sync wrapper around the async Edge-TTS call.
+    Returns the path of the saved word timings, or None if Edge TTS
+    reported none.
+    """
+    words = asyncio.run(_make_voice(text, output_path, voice))
+    if not words:
+        return None
+    return save_words(words, words_path_for(output_path))
+
+
+def save_words(words: list[dict], words_path: str) -> str:
+    """Write timed words as JSON and return the path."""
+    with open(words_path, "w", encoding="utf-8") as f:
+        json.dump(words, f, indent=2)
+    return words_path
+
+
+def load_words(words_path: str, offset: float = 0.0) -> list[dict]:
+    """
+    Read word timings saved by save_words ({"word", "start", "end"} in
+    seconds), moved `offset` seconds earlier (e.g. the silence trimmed from
+    the start of the audio by mastering).
+    """
+    with open(words_path, "r", encoding="utf-8") as f:
+        words = json.load(f)
+    return [
+        {
+            "word": w["word"],
+            "start": round(max(w["start"] - offset, 0.0), 3),
+            "end": round(max(w["end"] - offset, 0.0), 3),
+        }
+        for w in words
+    ]
 
 
 if __name__ == "__main__":
@@ -0,0 +1,115 @@
+"""
+Shared HTTP client for every outbound API call (Gemini, Pexels).
+One pooled keep-alive session per process, with per-host concurrency limits,
+configurable timeouts and retry/backoff on 429 and 5xx responses.
+"""
+
+import os
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from dotenv import load_dotenv
+
+load_dotenv()
+
+CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "10"))
+READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "60"))
+MAX_RETRIES = int(os.getenv("HTTP_RETRIES", "3"))
+BACKOFF_FACTOR = float(os.getenv("HTTP_BACKOFF", "1.0"))  # 1s, 2s, 4s, ...
+MAX_PER_HOST = int(os.getenv("HTTP_MAX_PER_HOST", "6"))
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_session = None
+_session_lock = threading.Lock()
+_host_limits = {}
+_host_limits_lock = threading.Lock()
+
+
+def _build_session() -> requests.Session:
+    retry = Retry(
+        total=MAX_RETRIES,
+        connect=MAX_RETRIES,
+        # A read timeout or dropped connection may come after the server has
+        # processed (and billed) the request, so those are never retried
+        read=0,
+        other=0,
+        status=MAX_RETRIES,
+        backoff_factor=BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUSES,
+        # A 429/5xx means the request wasn't processed, and a connect error
+        # means it was never sent, so POSTs are safe to retry on those
+        allowed_methods=frozenset(["GET", "HEAD", "POST"]),
+        respect_retry_after_header=True,
+        # Hand the last response back so callers' raise_for_status() reports it
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=8,          # distinct hosts kept in the pool
+        pool_maxsize=MAX_PER_HOST,   # keep-alive connections per host
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session() -> requests.Session:
+    """Return this process's shared session, creating it on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def _host_limit(url: str) -> threading.BoundedSemaphore:
+    host = urlsplit(url).netloc
+    with _host_limits_lock:
+        if host not in _host_limits:
+            _host_limits[host] = threading.BoundedSemaphore(MAX_PER_HOST)
+        return _host_limits[host]
+
+
+def request(method: str, url: str, timeout: float = None, **kwargs) -> requests.Response:
+    """
+    Send a request through the shared session.
+    timeout: read timeout in seconds (defaults to HTTP_READ_TIMEOUT); the
+             connect timeout is always HTTP_CONNECT_TIMEOUT.
+    At most HTTP_MAX_PER_HOST requests per host are in flight at once. The
+    limit is released when this returns, so stream large bodies with
+    download() instead of stream=True.
+    """
+    timeouts = (CONNECT_TIMEOUT, timeout if timeout is not None else READ_TIMEOUT)
+    with _host_limit(url):
+        return get_session().request(method, url, timeout=timeouts, **kwargs)
+
+
+def download(url: str, dest: str, timeout: float = None, chunk_size: int = 64 * 1024, **kwargs):
+    """
+    Stream the body of a GET to `dest`, holding the host's slot until it has
+    been read. Written to a .part file first so an interrupted download never
+    looks complete.
+    """
+    timeouts = (CONNECT_TIMEOUT, timeout if timeout is not None else READ_TIMEOUT)
+    tmp_path = dest + ".part"
+    with _host_limit(url):
+        with get_session().get(url, stream=True, timeout=timeouts, **kwargs) as response:
+            response.raise_for_status()
+            with open(tmp_path, "wb") as f:
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    f.write(chunk)
+    os.replace(tmp_path, dest)
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return request("GET", url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return request("POST", url, **kwargs)
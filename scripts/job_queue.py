@@ -0,0 +1,379 @@
+"""
+Job Queue — persistent pipeline queue backed by SQLite.
+server.py enqueues requests here and a pool of worker processes drains it,
+so triggers are never dropped while another video is rendering.
+"""
+
+import os
+import json
+import time
+import uuid
+import sqlite3
+import multiprocessing
+from datetime import datetime
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DB_PATH = os.getenv("PIPELINE_QUEUE_DB", os.path.join(PROJECT_DIR, "runs", "jobs.db"))
+NUM_WORKERS = int(os.getenv("PIPELINE_WORKERS", "1"))
+POLL_INTERVAL = 2.0  # seconds between queue checks when idle
+
+
+def _connect(db_path: str = DB_PATH) -> sqlite3.Connection:
+    """Open a connection that tolerates several writer processes."""
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+
+def init_db(db_path: str = DB_PATH):
+    """Create the jobs table if it doesn't exist yet."""
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    conn = _connect(db_path)
+    try:
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id          TEXT PRIMARY KEY,
+                status      TEXT NOT NULL,
+                params      TEXT NOT NULL,
+                run_id      TEXT,
+                worker      TEXT,
+                error       TEXT,
+                result      TEXT,
+                created_at  REAL NOT NULL,
+                started_at  REAL,
+                finished_at REAL
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, created_at)")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS job_stages (
+                job_id      TEXT NOT NULL,
+                stage       TEXT NOT NULL,
+                step        TEXT NOT NULL,
+                status      TEXT NOT NULL,
+                started_at  REAL,
+                finished_at REAL,
+                PRIMARY KEY (job_id, stage)
+            )
+            """
+        )
+        # Databases created before results were tracked lack the column
+        columns = [row["name"] for row in conn.execute("PRAGMA table_info(jobs)")]
+        if "result" not in columns:
+            conn.execute("ALTER TABLE jobs ADD COLUMN result TEXT")
+    finally:
+        conn.close()
+
+
+def enqueue(params: dict, db_path: str = DB_PATH) -> str:
+    """Add a pipeline request to the queue. Returns the new job id."""
+    job_id = uuid.uuid4().hex[:12]
+    conn = _connect(db_path)
+    try:
+        conn.execute(
+            "INSERT INTO jobs (id, status, params, created_at) VALUES (?, 'queued', ?, ?)",
+            (job_id, json.dumps(params), time.time()),
+        )
+    finally:
+        conn.close()
+    print(f"[Queue] Enqueued job {job_id}: {params.get('topic')}")
+    return job_id
+
+
+def claim_next(worker: str, db_path: str = DB_PATH) -> dict | None:
+    """
+    Atomically move the oldest queued job to 'running' and return it.
+    Returns None when the queue is empty.
+    """
+    conn = _connect(db_path)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute(
+            "SELECT * FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+        ).fetchone()
+        if row is None:
+            conn.execute("COMMIT")
+            return None
+
+        run_id = row["run_id"] or f"{datetime.now():%Y%m%d_%H%M%S}_{row['id']}"
+        conn.execute(
+            "UPDATE jobs SET status = 'running', worker = ?, run_id = ?, started_at = ? "
+            "WHERE id = ?",
+            (worker, run_id, time.time(), row["id"]),
+        )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+    job = dict(row)
+    job["params"] = json.loads(job["params"])
+    job["status"] = "running"
+    job["run_id"] = run_id
+    return job
+
+
+def mark_done(job_id: str, db_path: str = DB_PATH):
+    """Record a successful pipeline run."""
+    conn = _connect(db_path)
+    try:
+        conn.execute(
+            "UPDATE jobs SET status = 'done', error = NULL, finished_at = ? WHERE id = ?",
+            (time.time(), job_id),
+        )
+    finally:
+        conn.close()
+
+
+def mark_failed(job_id: str, error: str, db_path: str = DB_PATH):
+    """Record a failed pipeline run."""
+    conn = _connect(db_path)
+    try:
+        conn.execute(
+            "UPDATE jobs SET status = 'failed', error = ?, finished_at = ? WHERE id = ?",
+            (error, time.time(), job_id),
+        )
+    finally:
+        conn.close()
+
+
+def record_stage(job_id: str, stage: str, step: str, status: str, db_path: str = DB_PATH):
+    """
+    Record a stage transition for a job.
+    status: "running", "done", "failed" or "skipped".
+    """
+    now = time.time()
+    conn = _connect(db_path)
+    try:
+        if status == "running":
+            conn.execute(
+                "INSERT OR REPLACE INTO job_stages (job_id, stage, step, status, started_at) "
+                "VALUES (?, ?, ?, 'running', ?)",
+                (job_id, stage, step, now),
+            )
+        else:
+            conn.execute(
+                "INSERT INTO job_stages (job_id, stage, step, status, started_at, finished_at) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (job_id, stage) DO UPDATE SET status = excluded.status, "
+                "finished_at = excluded.finished_at",
+                (job_id, stage, step, status, now, now),
+            )
+    finally:
+        conn.close()
+
+
+def set_result(job_id: str, result: dict, db_path: str = DB_PATH):
+    """Store the final output paths / YouTube id of a job."""
+    conn = _connect(db_path)
+    try:
+        conn.execute("UPDATE jobs SET result = ? WHERE id = ?", (json.dumps(result), job_id))
+    finally:
+        conn.close()
+
+
+def _elapsed(started: float | None, finished: float | None) -> float | None:
+    if started is None:
+        return None
+    return round((finished or time.time()) - started, 1)
+
+
+def _job_to_dict(row: sqlite3.Row, stages: list[sqlite3.Row]) -> dict:
+    job = dict(row)
+    job["params"] = json.loads(job["params"])
+    job["result"] = json.loads(job["result"]) if job["result"] else None
+    job["elapsed"] = _elapsed(job["started_at"], job["finished_at"])
+    job["stages"] = [
+        {
+            "stage": st["stage"],
+            "step": st["step"],
+            "status": st["status"],
+            "started_at": st["started_at"],
+            "finished_at": st["finished_at"],
+            "elapsed": _elapsed(st["started_at"], st["finished_at"]),
+        }
+        for st in stages
+    ]
+    running = [st["stage"] for st in stages if st["status"] == "running"]
+    job["current_stage"] = running[-1] if running else None
+    return job
+
+
+def get_job(job_id: str, db_path: str = DB_PATH) -> dict | None:
+    """Return a job with its per-stage progress, or None if unknown."""
+    conn = _connect(db_path)
+    try:
+        row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        stages = conn.execute(
+            "SELECT * FROM job_stages WHERE job_id = ? ORDER BY started_at", (job_id,)
+        ).fetchall()
+    finally:
+        conn.close()
+    return _job_to_dict(row, stages)
+
+
+def list_jobs(status: str = None, limit: int = 50, db_path: str = DB_PATH) -> list[dict]:
+    """Return the most recent jobs (newest first), optionally filtered by status."""
+    conn = _connect(db_path)
+    try:
+        if status:
+            rows = conn.execute(
+                "SELECT * FROM jobs WHERE status = ? ORDER BY created_at DESC LIMIT ?",
+                (status, limit),
+            ).fetchall()
+        else:
+            rows = conn.execute(
+                "SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        jobs = []
+        for row in rows:
+            stages = conn.execute(
+                "SELECT * FROM job_stages WHERE job_id = ? ORDER BY started_at", (row["id"],)
+            ).fetchall()
+            jobs.append(_job_to_dict(row, stages))
+    finally:
+        conn.close()
+    return jobs
+
+
+def stage_reporter(job_id: str, db_path: str = DB_PATH):
+    """Build a `progress(stage, step, status)` callback for run_pipeline."""
+    def progress(stage: str, step: str, status: str):
+        try:
+            record_stage(job_id, stage, step, status, db_path)
+        except sqlite3.Error as e:
+            # Progress reporting must never break a render
+            print(f"[Queue] Could not record stage '{stage}': {e}")
+    return progress
+
+
+def retry_job(job_id: str, db_path: str = DB_PATH) -> bool:
+    """
+    Put a failed job — or a finished one whose requested upload didn't
+    happen — back in the queue under the same run id so it resumes from its
+    first incomplete stage.
+    Returns False if the job is unknown, still queued/running or complete.
+    """
+    conn = _connect(db_path)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        cur = conn.execute(
+            "UPDATE jobs SET status = 'queued', error = NULL, result = NULL, worker = NULL, "
+            "started_at = NULL, finished_at = NULL "
+            "WHERE id = ? AND (status = 'failed' OR (status = 'done' "
+            "AND json_extract(params, '$.upload') "
+            "AND json_extract(result, '$.youtube_id') IS NULL))",
+            (job_id,),
+        )
+        if cur.rowcount:
+            conn.execute("DELETE FROM job_stages WHERE job_id = ?", (job_id,))
+        conn.execute("COMMIT")
+        return cur.rowcount > 0
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+
+def requeue_interrupted(db_path: str = DB_PATH) -> int:
+    """Put jobs left 'running' by a previous server process back in the queue."""
+    conn = _connect(db_path)
+    try:
+        cur = conn.execute(
+            "UPDATE jobs SET status = 'queued', worker = NULL, started_at = NULL "
+            "WHERE status = 'running'"
+        )
+        return cur.rowcount
+    finally:
+        conn.close()
+
+
+def _run_job(job: dict, db_path: str = DB_PATH):
+    """
+    Execute one queued pipeline run inside this worker process.
+    main (and with it every scripts.* module) is imported once per worker,
+    so warm state — Whisper model, HTTP sessions, fonts, the YouTube
+    service — is reused across jobs.
+    """
+    import main
+
+    params = job["params"]
+    result = main.run_pipeline(
+        params["topic"],
+        upload=params["upload"],
+        format_type="portrait" if params["format"] == "short" else "landscape",
+        privacy=params["privacy"],
+        run_id=job["run_id"],
+        progress=stage_reporter(job["id"], db_path),
+        # Retried and interrupted jobs keep their run id and pick up from
+        # the run's checkpoints; new run ids simply start from scratch
+        resume=True,
+    )
+    set_result(job["id"], result, db_path)
+
+
+def worker_loop(worker: str, db_path: str = DB_PATH, poll_interval: float = POLL_INTERVAL):
+    """Drain the queue forever, one job at a time."""
+    # The pipeline uses paths relative to the project root
+    os.chdir(PROJECT_DIR)
+    import main  # noqa: F401 — pay the import cost before the first job arrives
+
+    print(f"[Queue] Worker {worker} started (pid {os.getpid()})")
+    try:
+        while True:
+            job = claim_next(worker, db_path)
+            if job is None:
+                time.sleep(poll_interval)
+                continue
+
+            print(f"[Queue] {worker} picked up job {job['id']} (run {job['run_id']})")
+            try:
+                _run_job(job, db_path)
+            except Exception as e:
+                print(f"[Queue] Job {job['id']} failed: {e}")
+                mark_failed(job["id"], str(e), db_path)
+            else:
+                print(f"[Queue] Job {job['id']} done.")
+                mark_done(job["id"], db_path)
+    except KeyboardInterrupt:
+        pass
+
+
+def start_workers(num_workers: int = NUM_WORKERS, db_path: str = DB_PATH) -> list:
+    """
+    Initialise the queue and spawn `num_workers` worker processes (plus the
+    shared transcription service, if TRANSCRIBER_ADDRESS is set).
+    """
+    init_db(db_path)
+    recovered = requeue_interrupted(db_path)
+    if recovered:
+        print(f"[Queue] Re-queued {recovered} interrupted job(s).")
+
+    from scripts import transcriber
+    address = transcriber.ADDRESS
+    if address and transcriber.is_local(address) and not os.getenv("TRANSCRIBER_AUTHKEY"):
+        # A fresh secret shared with the service and workers through the environment
+        os.environ["TRANSCRIBER_AUTHKEY"] = os.urandom(32).hex()
+    transcriber.start_service()
+
+    workers = []
+    for i in range(max(1, num_workers)):
+        proc = multiprocessing.Process(
+            target=worker_loop,
+            args=(f"worker-{i + 1}", db_path),
+            # Not a daemon: the stage scheduler needs to spawn its own process pool
+            daemon=False,
+        )
+        proc.start()
+        workers.append(proc)
+    return workers
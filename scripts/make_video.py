@@ -1,22 +1,34 @@
 """
-Step 5 — Create Video (.mp4) from images + voiceover using MoviePy.
-Combines downloaded images with the generated voice narration.
+Step 5 — Create Video (.mp4) from images + voiceover.
+Combines downloaded images with the generated voice narration. The default
+"ffmpeg" renderer hands the slideshow straight to ffmpeg's concat demuxer
+(no per-frame Python work), "segments" encodes each image in parallel and
+joins the pieces without re-encoding, and the original MoviePy compositing
+path remains available as renderer="moviepy". Whichever is used, each image
+is cover-scaled and center-cropped to the output resolution once, with
+Pillow, and cached. Optional Ken Burns motion (scripts/motion.py) is
+rendered inside ffmpeg as well, as are transitions between images
+(scripts/transitions.py).
 """
 
 import os
 import glob
+import math
+import hashlib
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 
 # Pillow 10+ removed ANTIALIAS; MoviePy 1.0.3 still references it.
-from PIL import Image
+from PIL import Image, ImageOps
 if not hasattr(Image, "ANTIALIAS"):
     Image.ANTIALIAS = Image.LANCZOS
 
-from moviepy.editor import (
-    ImageClip,
-    AudioFileClip,
-    concatenate_videoclips,
-    CompositeVideoClip,
-)
+from scripts.media import probe_duration, run_ffmpeg
+from scripts.encoding import profile_name, get_profile, x264_args, audio_args
+from scripts.subtitles import subtitle_filter
+from scripts import motion as motion_fx
+from scripts import transitions
+from scripts.timeline import load_timeline, image_durations
 
 IMAGES_DIR = os.path.join("assets", "images")
 AUDIO_PATH = os.path.join("assets", "audio", "voice.mp3")
@@ -30,22 +42,415 @@ RESOLUTIONS = {
 
 TARGET_WIDTH = 1920
 TARGET_HEIGHT = 1080
+# "ffmpeg" (one encoder), "segments" (one encoder per image, in parallel)
+# or "moviepy" (frame-by-frame compositing)
+RENDERER = os.getenv("VIDEO_RENDERER", "ffmpeg")
+# Concurrent segment encodes for the "segments" renderer
+SEGMENT_JOBS = int(os.getenv("VIDEO_SEGMENT_JOBS", "0")) or os.cpu_count() or 1
 
+# Images already scaled to an output resolution, keyed on source content + size;
+# least recently used frames are evicted beyond FRAME_CACHE_MAX_MB
+FRAME_CACHE_DIR = os.getenv("FRAME_CACHE_DIR", os.path.join("cache", "frames"))
+FRAME_CACHE_MAX_BYTES = int(float(os.getenv("FRAME_CACHE_MAX_MB", "1000")) * 1024 * 1024)
 
-def _resize_image_clip(clip, target_width, target_height):
-    """Resize and pad/crop an image clip to target dimensions."""
-    w, h = clip.size
-    # Scale to cover the target area
-    scale = max(target_width / w, target_height / h)
-    clip = clip.resize(newsize=(int(w * scale), int(h * scale)))
-    # Center-crop to exact target
-    clip = clip.crop(
-        x_center=clip.w / 2,
-        y_center=clip.h / 2,
-        width=target_width,
-        height=target_height,
+
+def _prepare_image(img_path: str, target_width: int, target_height: int) -> str:
+    """
+    Cover-scale and center-crop one image to the target size, once.
+    Returns the path of the prepared frame in FRAME_CACHE_DIR.
+    """
+    with open(img_path, "rb") as f:
+        digest = hashlib.sha256(f.read()).hexdigest()[:32]
+    frame_path = os.path.join(FRAME_CACHE_DIR, f"{digest}_{target_width}x{target_height}.jpg")
+    try:
+        os.utime(frame_path)  # most recently used
+        return frame_path
+    except FileNotFoundError:
+        pass
+
+    with Image.open(img_path) as img:
+        img = ImageOps.exif_transpose(img).convert("RGB")
+        frame = ImageOps.fit(img, (target_width, target_height), Image.LANCZOS)
+
+    os.makedirs(FRAME_CACHE_DIR, exist_ok=True)
+    # Unique per call: another thread or run may be preparing the same image
+    fd, tmp_path = tempfile.mkstemp(dir=FRAME_CACHE_DIR, suffix=".jpg.tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            frame.save(f, "JPEG", quality=95)
+        os.replace(tmp_path, frame_path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return frame_path
+
+
+def _evict_frames(keep: set[str]):
+    """Remove the least recently used frames beyond FRAME_CACHE_MAX_BYTES, except `keep`."""
+    frames = []
+    for name in os.listdir(FRAME_CACHE_DIR):
+        if not name.endswith(".jpg"):
+            continue
+        path = os.path.join(FRAME_CACHE_DIR, name)
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            continue
+        frames.append((st.st_mtime, st.st_size, path))
+
+    total = sum(size for _, size, _ in frames)
+    for _, size, path in sorted(frames):
+        if total <= FRAME_CACHE_MAX_BYTES:
+            break
+        if path in keep:
+            continue
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+
+
+def prepare_images(image_files: list[str], target_width: int, target_height: int) -> list[str]:
+    """Prepare every image in parallel (Pillow releases the GIL while resizing)."""
+    # Scenes can share a photo: prepare each distinct file once
+    unique = list(dict.fromkeys(image_files))
+    with ThreadPoolExecutor(max_workers=min(8, len(unique))) as pool:
+        prepared = dict(zip(unique, pool.map(
+            lambda path: _prepare_image(path, target_width, target_height), unique
+        )))
+    _evict_frames(set(prepared.values()))
+    return [prepared[path] for path in image_files]
+
+
+def _video_filter(profile: dict, subtitles_path: str = None, offset: float = None) -> str:
+    """
+    Filter chain for pre-sized frames: render at the profile's render_fps,
+    burn subtitles, then duplicate frames up to the output fps.
+    offset: start time of a segment within the full timeline.
+    """
+    render_fps = profile["render_fps"] or profile["fps"]
+    # Convert the pixel format before fps duplicates frames, so each image
+    # is converted once
+    filters = ["setsar=1", f"format={profile['pix_fmt']}", f"fps={render_fps}"]
+    if subtitles_path:
+        if offset:
+            # Shift timestamps to the segment's place in the timeline so the
+            # subtitles line up, then reset them for concatenation
+            filters += [
+                f"setpts=PTS+{offset:.6f}/TB",
+                subtitle_filter(subtitles_path),
+                "setpts=PTS-STARTPTS",
+            ]
+        else:
+            filters.append(subtitle_filter(subtitles_path))
+    # The fps filter drops the final frame at end of stream; a cloned frame
+    # keeps it (the surplus is cut by -t / -frames:v)
+    filters += ["tpad=stop_mode=clone:stop=1", f"fps={profile['fps']}"]
+    return ",".join(filters)
+
+
+def _audio_options(profile: dict, copy_audio: bool) -> list[str]:
+    """Copy an already-encoded AAC track, else encode with the profile's settings."""
+    return ["-c:a", "copy"] if copy_audio else audio_args(profile)
+
+
+def _write_concat_list(image_files: list[str], durations: list[float], list_path: str):
+    """ffconcat playlist showing each image for its duration in seconds."""
+    lines = ["ffconcat version 1.0"]
+    for img_path, duration in zip(image_files, durations):
+        escaped = os.path.abspath(img_path).replace("'", "'\\''")
+        lines.append(f"file '{escaped}'")
+        lines.append(f"duration {duration:.3f}")
+    # The concat demuxer ignores the last entry's duration unless it is repeated
+    lines.append(lines[-2])
+    with open(list_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def _frame_boundaries(durations: list[float], fps: float) -> list[int]:
+    """
+    Frame index where each image starts (plus the end), cut on whole frames
+    so the images add up to exactly the total length. Every image keeps at
+    least one frame.
+    """
+    boundaries, elapsed = [0], 0.0
+    for duration in durations:
+        elapsed += duration
+        boundaries.append(max(round(elapsed * fps), boundaries[-1] + 1))
+    return boundaries
+
+
+def _print_durations(durations: list[float]):
+    total = sum(durations)
+    print(f"[Video] Audio duration: {total:.1f}s")
+    print(f"[Video] {len(durations)} images: " + ", ".join(f"{d:.1f}s" for d in durations))
+
+
+def _render_ffmpeg_graph(
+    image_files: list[str],
+    durations: list[float],
+    audio_path: str,
+    output_path: str,
+    profile: dict,
+    size: tuple[int, int],
+    subtitles_path: str = None,
+    motion: str = "none",
+    transition: str = "none",
+    copy_audio: bool = False,
+) -> str:
+    """
+    Single ffmpeg invocation with one input per image: each image becomes a
+    clip (static, or animated by zoompan), then the clips are joined with
+    hard cuts or xfade transitions.
+    """
+    render_fps = profile["render_fps"] or profile["fps"]
+    boundaries = _frame_boundaries(durations, render_fps)
+
+    overlap = 0
+    if transition != "none" and len(image_files) > 1:
+        overlap = transitions.overlap_frames(boundaries, render_fps)
+    frames = transitions.clip_frames(boundaries, overlap)
+
+    inputs, chains = [], []
+    for i, frame_path in enumerate(image_files):
+        inputs += ["-i", frame_path]
+        if motion != "none":
+            zoompan = motion_fx.zoompan_filter(motion_fx.move_for(i), frames[i], *size, render_fps)
+            source = f"{zoompan},format={profile['pix_fmt']}"
+        else:
+            # Decode and convert the image once, then repeat it in memory
+            source = (
+                f"format={profile['pix_fmt']},loop=loop={frames[i] - 1}:size=1:start=0,"
+                f"setpts=N/{render_fps}/TB,fps={render_fps}"
+            )
+        chains.append(f"[{i}:v]{source},setsar=1[v{i}]")
+
+    labels = [f"v{i}" for i in range(len(image_files))]
+    if overlap:
+        chains += transitions.xfade_chain(labels, boundaries, overlap, render_fps, transition, "joined")
+    else:
+        chains.append("".join(f"[{label}]" for label in labels) + f"concat=n={len(labels)}:v=1:a=0[joined]")
+    chains.append(f"[joined]{_video_filter(profile, subtitles_path)}[video]")
+
+    run_ffmpeg([
+        *inputs,
+        "-i", audio_path,
+        "-filter_complex", ";".join(chains),
+        "-map", "[video]", "-map", f"{len(image_files)}:a",
+        *x264_args(profile),
+        *_audio_options(profile, copy_audio),
+        "-t", f"{sum(durations):.3f}",
+        "-movflags", "+faststart",
+        output_path,
+    ])
+    return output_path
+
+
+def _render_ffmpeg(
+    image_files: list[str],
+    durations: list[float],
+    audio_path: str,
+    output_path: str,
+    profile: dict,
+    size: tuple[int, int],
+    subtitles_path: str = None,
+    motion: str = "none",
+    transition: str = "none",
+    copy_audio: bool = False,
+) -> str:
+    """Encode the slideshow with a single ffmpeg invocation."""
+    if motion != "none" or transition != "none":
+        return _render_ffmpeg_graph(
+            image_files, durations, audio_path, output_path, profile, size,
+            subtitles_path, motion, transition, copy_audio,
+        )
+
+    total_duration = sum(durations)
+    with tempfile.TemporaryDirectory() as tmp:
+        list_path = os.path.join(tmp, "images.txt")
+        _write_concat_list(image_files, durations, list_path)
+        run_ffmpeg([
+            "-f", "concat", "-safe", "0", "-i", list_path,
+            "-i", audio_path,
+            "-map", "0:v", "-map", "1:a",
+            "-vf", _video_filter(profile, subtitles_path),
+            *x264_args(profile),
+            *_audio_options(profile, copy_audio),
+            "-t", f"{total_duration:.3f}",
+            "-movflags", "+faststart",
+            output_path,
+        ])
+    return output_path
+
+
+def _encode_segment(
+    frame_path: str,
+    start_frame: int,
+    num_frames: int,
+    segment_path: str,
+    profile: dict,
+    subtitles_path: str,
+    threads: int,
+    size: tuple[int, int],
+    move: str = None,
+):
+    """
+    Encode one still image as a video-only segment of `num_frames` frames,
+    optionally animated with a Ken Burns `move`.
+    """
+    render_fps = profile["render_fps"] or profile["fps"]
+    video_filter = _video_filter(profile, subtitles_path, offset=start_frame / profile["fps"])
+    if move:
+        # zoompan generates every frame from the single input frame; one
+        # spare frame covers the last output frame after fps conversion
+        render_frames = math.ceil(num_frames * render_fps / profile["fps"]) + 1
+        zoompan = motion_fx.zoompan_filter(move, render_frames, *size, render_fps)
+        source = ["-i", frame_path]
+        video_filter = f"{zoompan},{video_filter}"
+    else:
+        source = ["-loop", "1", "-framerate", str(render_fps), "-i", frame_path]
+    run_ffmpeg([
+        *source,
+        "-frames:v", str(num_frames),
+        "-vf", video_filter,
+        *x264_args(profile),
+        "-threads", str(threads),
+        "-an",
+        segment_path,
+    ], progress=False)
+
+
+def _render_segments(
+    image_files: list[str],
+    durations: list[float],
+    audio_path: str,
+    output_path: str,
+    profile: dict,
+    size: tuple[int, int],
+    subtitles_path: str = None,
+    motion: str = "none",
+    transition: str = "none",
+    copy_audio: bool = False,
+) -> str:
+    """
+    Encode each image as its own segment in parallel, join the segments
+    with the concat demuxer (stream copy) and mux the voice track once.
+    """
+    total_duration = sum(durations)
+    num_images = len(image_files)
+    boundaries = _frame_boundaries(durations, profile["fps"])
+
+    jobs = min(SEGMENT_JOBS, num_images)
+    threads = max(1, (os.cpu_count() or 1) // jobs)
+    if transition != "none":
+        # Segments are cut at the scene boundaries, so nothing can overlap them
+        print("[Video] Transitions need renderer=ffmpeg, using hard cuts between segments.")
+    print(f"[Video] Encoding {num_images} segments, {jobs} at a time...")
+
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(output_path)) as tmp:
+        segment_paths = [os.path.join(tmp, f"segment{i:03d}.mp4") for i in range(num_images)]
+        # ffmpeg does the work, so threads are enough to keep every core busy
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            futures = [
+                pool.submit(
+                    _encode_segment,
+                    frame_path,
+                    boundaries[i],
+                    boundaries[i + 1] - boundaries[i],
+                    segment_paths[i],
+                    profile,
+                    subtitles_path,
+                    threads,
+                    size,
+                    motion_fx.move_for(i) if motion != "none" else None,
+                )
+                for i, frame_path in enumerate(image_files)
+            ]
+            for future in futures:
+                future.result()
+
+        list_path = os.path.join(tmp, "segments.txt")
+        with open(list_path, "w", encoding="utf-8") as f:
+            f.write("ffconcat version 1.0\n")
+            for segment_path in segment_paths:
+                f.write(f"file '{os.path.abspath(segment_path)}'\n")
+
+        run_ffmpeg([
+            "-f", "concat", "-safe", "0", "-i", list_path,
+            "-i", audio_path,
+            "-map", "0:v", "-map", "1:a",
+            "-c:v", "copy",
+            *_audio_options(profile, copy_audio),
+            "-t", f"{total_duration:.3f}",
+            "-movflags", "+faststart",
+            output_path,
+        ])
+    return output_path
+
+
+def _render_moviepy(
+    image_files: list[str],
+    durations: list[float],
+    audio_path: str,
+    output_path: str,
+    profile: dict,
+    size: tuple[int, int],
+    subtitles_path: str = None,
+    motion: str = "none",
+    transition: str = "none",
+    copy_audio: bool = False,
+) -> str:
+    """
+    Composite the slideshow frame by frame with MoviePy. MoviePy always
+    re-encodes the audio, so copy_audio is ignored.
+    """
+    from moviepy.editor import ImageClip, AudioFileClip, concatenate_videoclips
+
+    if motion != "none":
+        print("[Video] Motion effects need an ffmpeg renderer, rendering static images.")
+    if transition != "none":
+        print("[Video] Transitions need renderer=ffmpeg, using hard cuts.")
+
+    audio = AudioFileClip(audio_path)
+    clips = [
+        ImageClip(img_path).set_duration(duration)
+        for img_path, duration in zip(image_files, durations)
+    ]
+
+    # Every frame has the same size, so clips can simply be chained
+    video = concatenate_videoclips(clips, method="chain")
+    video = video.set_audio(audio)
+
+    # The frames are piped into ffmpeg, so the same filter chain (subtitles,
+    # frame duplication) still applies during this encode
+    render_fps = profile["render_fps"] or profile["fps"]
+    ffmpeg_params = [
+        "-vf", _video_filter(profile, subtitles_path),
+        "-crf", str(profile["crf"]),
+        "-tune", profile["tune"],
+        "-g", str(int(profile["keyint_seconds"] * profile["fps"])),
+        "-pix_fmt", profile["pix_fmt"],
+    ]
+
+    video.write_videofile(
+        output_path,
+        fps=render_fps,
+        codec="libx264",
+        preset=profile["preset"],
+        audio_codec="aac",
+        audio_bitrate=profile["audio_bitrate"],
+        threads=os.cpu_count(),
+        ffmpeg_params=ffmpeg_params,
+        logger="bar",
     )
-    return clip
+
+    # Cleanup
+    audio.close()
+    for c in clips:
+        c.close()
+    video.close()
+    return output_path
 
 
 def create_video(
@@ -53,63 +458,103 @@ def create_video(
     audio_path: str = AUDIO_PATH,
     output_path: str = OUTPUT_PATH,
     format_type: str = "landscape",
+    renderer: str = RENDERER,
+    subtitles_path: str = None,
+    profile: str = None,
+    motion: str = motion_fx.MOTION,
+    transition: str = transitions.TRANSITION,
+    timeline_path: str = None,
+    copy_audio: bool = False,
 ) -> str:
     """
     Build the final video:
-    1. Load voice audio to determine total duration
-    2. Load images, resize to target resolution, distribute evenly across duration
-    3. Concatenate and attach audio
-    4. Export as .mp4
+    1. Read the voice audio duration
+    2. Scale and crop the images to the target resolution (cached) and
+       show each for its scene's share of the narration (or evenly)
+    3. Attach the audio and export as .mp4
 
-    format_type: "landscape" (1920×1080) or "portrait" (1080×1920 for Shorts)
+    format_type:    "landscape" (1920×1080) or "portrait" (1080×1920 for Shorts)
+    renderer:       "ffmpeg" (direct, fast), "segments" (parallel per-image
+                    encodes, fastest on many cores) or "moviepy" (frame-by-frame)
+    subtitles_path: optional .srt burned in during the same encode, instead
+                    of re-encoding the finished video afterwards
+    profile:        encoding profile name (see scripts/encoding.py); defaults
+                    to VIDEO_PROFILE or the format's default profile
+    motion:         "none" or "kenburns" (pan/zoom each image, see
+                    scripts/motion.py)
+    transition:     "none", "crossfade", "slide" or "dip" (to black) between
+                    images (renderer="ffmpeg"; see scripts/transitions.py)
+    timeline_path:  timeline.json from scripts/timeline.py; each image then
+                    lasts as long as its scene is being narrated
+    copy_audio:     mux the audio without re-encoding (for AAC tracks
+                    such as the mastered voice from scripts/audio.py)
     """
     if not os.path.exists(audio_path):
         raise FileNotFoundError(f"Audio file not found: {audio_path}")
 
-    # Get target dimensions based on format
-    target_width, target_height = RESOLUTIONS.get(format_type, RESOLUTIONS["landscape"])
-    print(f"[Video] Format: {format_type} ({target_width}×{target_height})")
+    renderers = {
+        "ffmpeg": _render_ffmpeg,
+        "segments": _render_segments,
+        "moviepy": _render_moviepy,
+    }
+    if renderer not in renderers:
+        raise ValueError(f"Unknown renderer '{renderer}' (expected one of {', '.join(renderers)})")
 
-    audio = AudioFileClip(audio_path)
-    total_duration = audio.duration
+    # Get target dimensions and encoder settings based on format
+    target_width, target_height = RESOLUTIONS.get(format_type, RESOLUTIONS["landscape"])
+    profile = profile_name(format_type, profile)
+    # MoviePy renders static images with hard cuts whatever is asked for
+    moving = renderer != "moviepy" and (motion != "none" or transition != "none")
+    settings = get_profile(profile, moving)
+    print(f"[Video] Format: {format_type} ({target_width}×{target_height}), "
+          f"renderer: {renderer}, profile: {profile}, motion: {motion}, transition: {transition}")
+    if motion not in ("none", "kenburns"):
+        raise ValueError(f"Unknown motion '{motion}' (expected 'none' or 'kenburns')")
+    transitions.validate(transition)
 
     # Collect images sorted by name
     image_files = sorted(glob.glob(os.path.join(images_dir, "img*.jpg")))
     if not image_files:
         raise FileNotFoundError(f"No images found in {images_dir}")
 
-    num_images = len(image_files)
-    per_image_duration = total_duration / num_images
-
-    print(f"[Video] Audio duration: {total_duration:.1f}s")
-    print(f"[Video] {num_images} images × {per_image_duration:.1f}s each")
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
 
-    clips = []
-    for img_path in image_files:
-        clip = ImageClip(img_path).set_duration(per_image_duration)
-        clip = _resize_image_clip(clip, target_width, target_height)
-        clips.append(clip)
+    total_duration = probe_duration(audio_path)
+    durations = None
+    if timeline_path:
+        timeline = load_timeline(timeline_path)
+        durations = image_durations(timeline, image_files)
+        if durations:
+            # Absorb any difference between the timeline and the actual audio
+            durations[-1] += total_duration - sum(durations)
+        else:
+            print("[Video] Images don't match the timeline's scenes, splitting evenly.")
+    if not durations:
+        durations = [total_duration / len(image_files)] * len(image_files)
+    _print_durations(durations)
 
-    video = concatenate_videoclips(clips, method="compose")
-    video = video.set_audio(audio)
+    # Moving frames need room around the visible area to pan and zoom into
+    if motion != "none" and renderer != "moviepy":
+        image_files = prepare_images(image_files, *motion_fx.oversized(target_width, target_height))
+    else:
+        image_files = prepare_images(image_files, target_width, target_height)
 
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    if subtitles_path:
+        print(f"[Video] Burning subtitles from {subtitles_path} in the same pass")
 
-    video.write_videofile(
+    renderers[renderer](
+        image_files,
+        durations,
+        audio_path,
         output_path,
-        fps=24,
-        codec="libx264",
-        audio_codec="aac",
-        threads=4,
-        logger="bar",
+        settings,
+        (target_width, target_height),
+        subtitles_path,
+        motion,
+        transition,
+        copy_audio,
     )
 
-    # Cleanup
-    audio.close()
-    for c in clips:
-        c.close()
-    video.close()
-
     print(f"[Video] Saved → {output_path}")
     return output_path
 
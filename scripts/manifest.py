@@ -0,0 +1,71 @@
+"""
+Run Manifest — per-run checkpoint file (runs/<run_id>/manifest.json).
+Each completed stage records its result here so an interrupted run can be
+resumed from the first incomplete stage without repeating API calls.
+"""
+
+import os
+import json
+import time
+
+MANIFEST_NAME = "manifest.json"
+
+
+def manifest_path(run_dir: str) -> str:
+    return os.path.join(run_dir, MANIFEST_NAME)
+
+
+def load_manifest(run_dir: str) -> dict | None:
+    """Return the run's manifest, or None if the run has none."""
+    path = manifest_path(run_dir)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(run_dir: str, manifest: dict):
+    """Write the manifest atomically so a crash never leaves it half-written."""
+    path = manifest_path(run_dir)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def new_manifest(run_dir: str, params: dict) -> dict:
+    """Start a fresh manifest recording the run's input parameters."""
+    manifest = {"params": params, "stages": {}, "created_at": time.time()}
+    save_manifest(run_dir, manifest)
+    return manifest
+
+
+def record_stage(run_dir: str, manifest: dict, stage: str, result):
+    """Mark `stage` complete with its (JSON-serialisable) result."""
+    manifest["stages"][stage] = {"result": result, "finished_at": time.time()}
+    save_manifest(run_dir, manifest)
+
+
+def _outputs_exist(result, run_dir: str) -> bool:
+    """Check that every run-directory file referenced by a stage result is still on disk."""
+    if isinstance(result, str):
+        if result.startswith(run_dir + os.sep):
+            return os.path.exists(result)
+        return True
+    if isinstance(result, list):
+        return all(_outputs_exist(item, run_dir) for item in result)
+    if isinstance(result, dict):
+        return all(_outputs_exist(item, run_dir) for item in result.values())
+    return True
+
+
+def completed_stages(run_dir: str, manifest: dict) -> dict:
+    """
+    Return stage name → result for every completed stage whose output files
+    still exist; stages with missing files are treated as incomplete.
+    """
+    completed = {}
+    for stage, entry in manifest.get("stages", {}).items():
+        if _outputs_exist(entry["result"], run_dir):
+            completed[stage] = entry["result"]
+    return completed
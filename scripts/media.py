@@ -0,0 +1,57 @@
+"""
+Media helpers shared by the render and subtitle steps: locating the ffmpeg
+binary, probing durations and running ffmpeg commands.
+"""
+
+import os
+import re
+import shutil
+import subprocess
+
+
+def _find_ffmpeg() -> str:
+    """ffmpeg on PATH, else the binary bundled with imageio-ffmpeg (MoviePy's)."""
+    binary = os.getenv("FFMPEG_PATH") or shutil.which("ffmpeg")
+    if binary:
+        return binary
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except (ImportError, RuntimeError):
+        return "ffmpeg"
+
+
+FFMPEG = _find_ffmpeg()
+
+_DURATION_RE = re.compile(r"Duration:\s*(\d+):(\d+):(\d+(?:\.\d+)?)")
+
+
+def probe_duration(path: str) -> float:
+    """Return a media file's duration in seconds (parsed from `ffmpeg -i`)."""
+    result = subprocess.run(
+        [FFMPEG, "-hide_banner", "-i", path],
+        capture_output=True,
+        text=True,
+    )
+    match = _DURATION_RE.search(result.stderr)
+    if not match:
+        raise RuntimeError(f"Could not read duration of {path}")
+    hrs, mins, secs = match.groups()
+    return int(hrs) * 3600 + int(mins) * 60 + float(secs)
+
+
+def run_ffmpeg(args: list[str], quiet: bool = True, progress: bool = True):
+    """
+    Run ffmpeg with `args`; raises CalledProcessError on failure.
+    quiet:    only log errors. progress: show the encoding stats line.
+    """
+    cmd = [FFMPEG, "-hide_banner", "-y"]
+    if quiet:
+        cmd += ["-loglevel", "error"]
+    cmd += ["-stats"] if progress else ["-nostats"]
+    subprocess.run(cmd + args, check=True)
+
+
+def escape_filter_path(path: str) -> str:
+    """Escape a file path for use inside an ffmpeg filter argument."""
+    return path.replace("\\", "/").replace(":", "\\:")
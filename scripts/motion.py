@@ -0,0 +1,69 @@
+"""
+Motion effects — Ken Burns pan/zoom for still images.
+The moves are ffmpeg `zoompan` expressions evaluated inside the encoder on
+frames pre-scaled larger than the output (so the crop window has sub-pixel
+room to move), which keeps the render free of per-frame Python work.
+"""
+
+import os
+
+MOTION = os.getenv("VIDEO_MOTION", "none")  # "none" or "kenburns"
+ZOOM = float(os.getenv("VIDEO_MOTION_ZOOM", "0.15"))  # how far each move zooms in
+EASING = os.getenv("VIDEO_MOTION_EASING", "ease-in-out")
+# Prepared frames are this much larger than the output resolution
+OVERSCAN = float(os.getenv("VIDEO_MOTION_OVERSCAN", "1.5"))
+
+# Progress curves over a scene, in ffmpeg expression syntax; {p} runs 0 → 1
+EASINGS = {
+    "linear": "{p}",
+    "ease-in": "{p}*{p}",
+    "ease-out": "1-(1-{p})*(1-{p})",
+    "ease-in-out": "{p}*{p}*(3-2*{p})",
+}
+
+# Scenes cycle through these so consecutive images move differently
+MOVES = ["zoom-in", "pan-right", "zoom-out", "pan-left"]
+
+
+def oversized(width: int, height: int, overscan: float = OVERSCAN) -> tuple[int, int]:
+    """Size to prepare frames at for motion (kept even for yuv420p)."""
+    return (int(width * overscan) // 2 * 2, int(height * overscan) // 2 * 2)
+
+
+def move_for(index: int) -> str:
+    return MOVES[index % len(MOVES)]
+
+
+def zoompan_filter(
+    move: str,
+    num_frames: int,
+    width: int,
+    height: int,
+    fps: float,
+    easing: str = EASING,
+    zoom: float = ZOOM,
+) -> str:
+    """
+    zoompan filter turning one input frame into `num_frames` output frames
+    of `width`×`height` that follow `move` with the given easing.
+    """
+    if easing not in EASINGS:
+        raise ValueError(f"Unknown easing '{easing}' (expected one of {', '.join(EASINGS)})")
+
+    progress = f"(on/{max(num_frames - 1, 1)})"
+    eased = "(" + EASINGS[easing].format(p=progress) + ")"
+    center_x = "(iw-iw/zoom)/2"
+    center_y = "(ih-ih/zoom)/2"
+
+    if move == "zoom-in":
+        z, x, y = f"1+{zoom}*{eased}", center_x, center_y
+    elif move == "zoom-out":
+        z, x, y = f"{1 + zoom}-{zoom}*{eased}", center_x, center_y
+    elif move == "pan-right":
+        z, x, y = f"{1 + zoom}", f"(iw-iw/zoom)*{eased}", center_y
+    elif move == "pan-left":
+        z, x, y = f"{1 + zoom}", f"(iw-iw/zoom)*(1-{eased})", center_y
+    else:
+        raise ValueError(f"Unknown move '{move}' (expected one of {', '.join(MOVES)})")
+
+    return f"zoompan=z='{z}':x='{x}':y='{y}':d={num_frames}:s={width}x{height}:fps={fps}"
@@ -0,0 +1,159 @@
+"""
+Pexels Cache — local cache of Pexels searches and downloaded photos.
+Normalised queries map to photo ids (with a TTL) and photo ids map to image
+files (size-bounded, least-recently-used eviction), so visuals that recur
+across videos cost no network I/O. Hit/miss counters are kept alongside.
+"""
+
+import os
+import re
+import json
+import time
+import sqlite3
+
+from scripts.stage_cache import copy_file
+
+CACHE_DIR = os.getenv("PEXELS_CACHE_DIR", os.path.join("cache", "pexels"))
+SEARCH_TTL = float(os.getenv("PEXELS_SEARCH_TTL_HOURS", "168")) * 3600  # 1 week
+MAX_BYTES = int(float(os.getenv("PEXELS_CACHE_MAX_MB", "500")) * 1024 * 1024)
+ENABLED = os.getenv("PEXELS_CACHE", "1") != "0"
+
+_IMAGES_DIR = os.path.join(CACHE_DIR, "images")
+_DB_PATH = os.path.join(CACHE_DIR, "index.db")
+_initialised = False
+
+
+def _connect() -> sqlite3.Connection:
+    global _initialised
+    if not _initialised:
+        os.makedirs(_IMAGES_DIR, exist_ok=True)
+    conn = sqlite3.connect(_DB_PATH, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    if not _initialised:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS searches ("
+            " query TEXT, orientation TEXT, per_page INTEGER, photos TEXT, fetched_at REAL,"
+            " PRIMARY KEY (query, orientation, per_page))"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS images ("
+            " photo_id TEXT PRIMARY KEY, path TEXT, size INTEGER, last_used REAL)"
+        )
+        conn.execute("CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, count INTEGER)")
+        _initialised = True
+    return conn
+
+
+def normalize_query(query: str) -> str:
+    """'Student  studying, with laptop!' → 'student studying with laptop'."""
+    query = re.sub(r"[^\w\s]", " ", query.lower())
+    return " ".join(query.split())
+
+
+def _count(conn: sqlite3.Connection, name: str):
+    conn.execute(
+        "INSERT INTO stats (name, count) VALUES (?, 1) "
+        "ON CONFLICT (name) DO UPDATE SET count = count + 1",
+        (name,),
+    )
+
+
+def get_search(query: str, orientation: str, per_page: int) -> list[dict] | None:
+    """Return cached photos for a search, or None if missing or expired."""
+    conn = _connect()
+    try:
+        row = conn.execute(
+            "SELECT photos, fetched_at FROM searches "
+            "WHERE query = ? AND orientation = ? AND per_page = ?",
+            (normalize_query(query), orientation, per_page),
+        ).fetchone()
+        if row is None or time.time() - row["fetched_at"] > SEARCH_TTL:
+            _count(conn, "search_miss")
+            return None
+        _count(conn, "search_hit")
+        return json.loads(row["photos"])
+    finally:
+        conn.close()
+
+
+def put_search(query: str, orientation: str, per_page: int, photos: list[dict]):
+    """Remember a search result (only the photo ids and download URLs)."""
+    slim = [{"id": p["id"], "src": {"large": p["src"]["large"]}} for p in photos]
+    conn = _connect()
+    try:
+        conn.execute(
+            "INSERT OR REPLACE INTO searches (query, orientation, per_page, photos, fetched_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (normalize_query(query), orientation, per_page, json.dumps(slim), time.time()),
+        )
+    finally:
+        conn.close()
+
+
+def get_image(photo_id, dest: str) -> bool:
+    """Place the cached file for `photo_id` at `dest`. Returns False on a miss."""
+    conn = _connect()
+    try:
+        row = conn.execute(
+            "SELECT path FROM images WHERE photo_id = ?", (str(photo_id),)
+        ).fetchone()
+        if row is None or not os.path.exists(row["path"]):
+            _count(conn, "image_miss")
+            return False
+        copy_file(row["path"], dest)
+        conn.execute(
+            "UPDATE images SET last_used = ? WHERE photo_id = ?", (time.time(), str(photo_id))
+        )
+        _count(conn, "image_hit")
+        return True
+    finally:
+        conn.close()
+
+
+def put_image(photo_id, src: str):
+    """Add a downloaded photo to the cache, evicting the least recently used."""
+    path = os.path.join(_IMAGES_DIR, f"{photo_id}.jpg")
+    conn = _connect()
+    try:
+        copy_file(src, path)
+        conn.execute(
+            "INSERT OR REPLACE INTO images (photo_id, path, size, last_used) VALUES (?, ?, ?, ?)",
+            (str(photo_id), path, os.path.getsize(path), time.time()),
+        )
+        _evict(conn)
+    finally:
+        conn.close()
+
+
+def _evict(conn: sqlite3.Connection):
+    total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM images").fetchone()[0]
+    if total <= MAX_BYTES:
+        return
+    for row in conn.execute("SELECT photo_id, path, size FROM images ORDER BY last_used").fetchall():
+        if total <= MAX_BYTES:
+            break
+        try:
+            os.remove(row["path"])
+        except FileNotFoundError:
+            pass
+        conn.execute("DELETE FROM images WHERE photo_id = ?", (row["photo_id"],))
+        total -= row["size"]
+
+
+def stats() -> dict:
+    """Hit/miss counters plus the current image cache size."""
+    conn = _connect()
+    try:
+        counts = {row["name"]: row["count"] for row in conn.execute("SELECT * FROM stats")}
+        size, files = conn.execute("SELECT COALESCE(SUM(size), 0), COUNT(*) FROM images").fetchone()
+    finally:
+        conn.close()
+    return {
+        "search_hit": counts.get("search_hit", 0),
+        "search_miss": counts.get("search_miss", 0),
+        "image_hit": counts.get("image_hit", 0),
+        "image_miss": counts.get("image_miss", 0),
+        "images": files,
+        "bytes": size,
+    }
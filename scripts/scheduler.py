@@ -0,0 +1,149 @@
+"""
+Stage Scheduler — runs the pipeline as a dependency graph.
+Stages whose inputs are ready run concurrently: threads for I/O-bound
+stages (API calls, downloads, ffmpeg subprocesses) and a process pool for
+CPU-bound Python work (MoviePy compositing).
+"""
+
+import os
+import time
+import multiprocessing
+from concurrent.futures import (
+    ThreadPoolExecutor,
+    ProcessPoolExecutor,
+    wait,
+    FIRST_COMPLETED,
+)
+from concurrent.futures.process import BrokenProcessPool
+
+MAX_THREADS = int(os.getenv("PIPELINE_STAGE_THREADS", "4"))
+# Set to 0 to run CPU stages in threads instead of separate processes
+MAX_PROCESSES = int(os.getenv("PIPELINE_STAGE_PROCESSES", "1"))
+
+# Kept alive between runs so a queue worker only pays the spawn cost once
+_process_pool = None
+
+
+class Stage:
+    """
+    One node of the pipeline graph.
+
+    func:     called as func(inputs) where inputs maps each dependency name
+              to its result. "cpu" stages must be picklable (module-level
+              functions or functools.partial of one).
+    deps:     names of the stages that must finish first.
+    kind:     "io" → thread pool, "cpu" → process pool.
+    optional: a failure is reported but doesn't abort the run; the stage's
+              result becomes None for its dependents.
+    """
+
+    def __init__(self, name: str, func, deps=(), kind: str = "io", optional: bool = False):
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+        self.kind = kind
+        self.optional = optional
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    if _process_pool is None:
+        # "spawn" — forking a process that is running I/O threads can deadlock
+        _process_pool = ProcessPoolExecutor(
+            max_workers=MAX_PROCESSES,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _process_pool
+
+
+def _discard_process_pool():
+    """Drop a broken pool (a worker died) so the next CPU stage starts a new one."""
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
+
+
+def drop_invalidated(stages: list[Stage], results: dict) -> dict:
+    """
+    Remove results whose dependencies are missing from `results`, so a stage
+    is re-run whenever anything upstream of it has to run again.
+    """
+    results = dict(results)
+    by_name = {stage.name: stage for stage in stages}
+    changed = True
+    while changed:
+        changed = False
+        for name in list(results):
+            stage = by_name.get(name)
+            if stage is None:
+                # Not part of this graph (e.g. upload disabled on resume)
+                del results[name]
+                changed = True
+            elif any(dep not in results for dep in stage.deps):
+                del results[name]
+                changed = True
+    return results
+
+
+def run_stages(stages: list[Stage], results: dict = None, on_start=None, on_finish=None) -> dict:
+    """
+    Execute `stages` respecting their dependencies.
+
+    results:   already-known stage results; those stages are not run again.
+    on_start:  optional callback on_start(name) when a stage is submitted.
+    on_finish: optional callback on_finish(name, result, error, elapsed) when
+               it ends (error is None on success).
+
+    Returns a dict of stage name → result. If a required stage fails, no new
+    stages are started, running ones are allowed to finish and the first
+    error is re-raised.
+    """
+    results = dict(results or {})
+    by_name = {stage.name: stage for stage in stages}
+    for stage in stages:
+        for dep in stage.deps:
+            if dep not in by_name and dep not in results:
+                raise ValueError(f"Stage '{stage.name}' depends on unknown stage '{dep}'")
+
+    pending = [stage for stage in stages if stage.name not in results]
+    running = {}  # future → (stage, start time)
+    error = None
+
+    with ThreadPoolExecutor(max_workers=MAX_THREADS) as threads:
+        while pending or running:
+            if error is None:
+                ready = [s for s in pending if all(d in results for d in s.deps)]
+                for stage in ready:
+                    pending.remove(stage)
+                    inputs = {dep: results[dep] for dep in stage.deps}
+                    if on_start:
+                        on_start(stage.name)
+                    use_processes = stage.kind == "cpu" and MAX_PROCESSES > 0
+                    pool = _get_process_pool() if use_processes else threads
+                    running[pool.submit(stage.func, inputs)] = (stage, time.time())
+
+            if not running:
+                if pending and error is None:
+                    names = ", ".join(s.name for s in pending)
+                    raise ValueError(f"Stage graph has a cycle between: {names}")
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, started = running.pop(future)
+                exc = future.exception()
+                if isinstance(exc, BrokenProcessPool):
+                    _discard_process_pool()
+                if exc is None:
+                    results[stage.name] = future.result()
+                elif stage.optional:
+                    results[stage.name] = None
+                elif error is None:
+                    error = exc
+                if on_finish:
+                    on_finish(stage.name, results.get(stage.name), exc, time.time() - started)
+
+    if error is not None:
+        raise error
+    return results
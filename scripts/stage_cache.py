@@ -0,0 +1,206 @@
+"""
+Stage Cache — content-addressed cache for pipeline stage outputs.
+Each stage's key hashes its own parameters together with the keys of the
+stages it depends on, so changing one input only invalidates the stages
+downstream of it. Results live under cache/<stage>/<key>/ together with
+copies of the files they reference; beyond PIPELINE_CACHE_MAX_MB the least
+recently used entries are evicted.
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+
+CACHE_DIR = os.getenv("PIPELINE_CACHE_DIR", "cache")
+ENABLED = os.getenv("PIPELINE_CACHE", "1") != "0"
+MAX_BYTES = int(float(os.getenv("PIPELINE_CACHE_MAX_MB", "2000")) * 1024 * 1024)
+CACHE_VERSION = 3  # bump to invalidate every entry after an incompatible change
+
+_FILE_MARKER = "__run_file__"
+
+
+def stage_keys(deps: dict, params: dict) -> dict:
+    """
+    Compute a cache key for every stage in `params`.
+
+    deps:   stage name → names of the stages it depends on (topological order).
+    params: stage name → the parameters that influence its output. Stages
+            without an entry (e.g. upload) are never cached, and neither is
+            anything downstream of them.
+    """
+    keys = {}
+    for stage, stage_deps in deps.items():
+        if stage not in params or any(dep not in keys for dep in stage_deps):
+            continue
+        payload = {
+            "version": CACHE_VERSION,
+            "stage": stage,
+            "params": params[stage],
+            "deps": {dep: keys[dep] for dep in stage_deps},
+        }
+        blob = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+        keys[stage] = hashlib.sha256(blob).hexdigest()[:32]
+    return keys
+
+
+def _entry_dir(stage: str, key: str) -> str:
+    return os.path.join(CACHE_DIR, stage, key)
+
+
+def _pack(value, run_dir: str, files: list):
+    """Replace run-directory paths in a result with relative file markers."""
+    if isinstance(value, str) and value.startswith(run_dir + os.sep) and os.path.isfile(value):
+        rel = os.path.relpath(value, run_dir)
+        files.append(rel)
+        return {_FILE_MARKER: rel}
+    if isinstance(value, list):
+        return [_pack(item, run_dir, files) for item in value]
+    if isinstance(value, dict):
+        return {k: _pack(v, run_dir, files) for k, v in value.items()}
+    return value
+
+
+def _unpack(value, run_dir: str):
+    """Turn file markers back into paths inside `run_dir`."""
+    if isinstance(value, dict):
+        if set(value) == {_FILE_MARKER}:
+            return os.path.join(run_dir, value[_FILE_MARKER])
+        return {k: _unpack(v, run_dir) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_unpack(item, run_dir) for item in value]
+    return value
+
+
+def copy_file(src: str, dst: str):
+    """
+    Copy `src` to `dst` through a temporary file, so `dst` is never seen
+    half-written. A copy rather than a hard link: a stage that rewrites its
+    output in place would otherwise change the cached file too.
+    """
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    # Unique per call: other threads may be copying to the same `dst`
+    with tempfile.NamedTemporaryFile(dir=os.path.dirname(dst), suffix=".tmp", delete=False) as f:
+        tmp = f.name
+    try:
+        shutil.copy2(src, tmp)
+        os.replace(tmp, dst)
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+
+def _entry_size(entry: str) -> int:
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(entry)
+        for name in names
+    )
+
+
+def _evict():
+    """Remove the least recently used entries until the cache fits MAX_BYTES."""
+    entries = []
+    for stage in os.listdir(CACHE_DIR):
+        stage_dir = os.path.join(CACHE_DIR, stage)
+        if not os.path.isdir(stage_dir):
+            continue
+        for key in os.listdir(stage_dir):
+            result_file = os.path.join(stage_dir, key, "result.json")
+            try:
+                # lookup() touches result.json on every hit
+                used = os.path.getmtime(result_file)
+            except OSError:
+                continue  # not a stage entry (e.g. cache/pexels) or half-written
+            entries.append((used, os.path.join(stage_dir, key)))
+
+    sizes = {entry: _entry_size(entry) for _, entry in entries}
+    total = sum(sizes.values())
+    for _, entry in sorted(entries):
+        if total <= MAX_BYTES:
+            break
+        # Rename first so a concurrent lookup sees a miss, not a partial entry
+        doomed = f"{entry}.evict{os.getpid()}"
+        try:
+            os.rename(entry, doomed)
+        except OSError:
+            continue
+        shutil.rmtree(doomed, ignore_errors=True)
+        total -= sizes[entry]
+        print(f"[Cache] Evicted {os.path.relpath(entry, CACHE_DIR)}")
+
+
+def lookup(stage: str, key: str, run_dir: str):
+    """
+    Restore a cached stage result into `run_dir`.
+    Returns (True, result) on a hit, (False, None) on a miss.
+    """
+    entry = _entry_dir(stage, key)
+    result_file = os.path.join(entry, "result.json")
+    if not os.path.exists(result_file):
+        return False, None
+
+    with open(result_file, "r", encoding="utf-8") as f:
+        stored = json.load(f)
+
+    try:
+        for rel in stored["files"]:
+            copy_file(os.path.join(entry, "files", rel), os.path.join(run_dir, rel))
+    except OSError as e:
+        print(f"[Cache] Entry {stage}/{key[:8]} is incomplete ({e}), ignoring it.")
+        return False, None
+
+    try:
+        os.utime(result_file)  # most recently used
+    except OSError:
+        pass
+
+    return True, _unpack(stored["result"], run_dir)
+
+
+def store(stage: str, key: str, result, run_dir: str):
+    """Save a stage result (and the run files it references) under its key."""
+    entry = _entry_dir(stage, key)
+    if os.path.exists(os.path.join(entry, "result.json")):
+        return
+
+    files = []
+    packed = _pack(result, run_dir, files)
+
+    # Build the entry next to its final location, then rename it into place
+    # so concurrent runs never see a half-written entry
+    tmp_entry = f"{entry}.tmp{os.getpid()}"
+    shutil.rmtree(tmp_entry, ignore_errors=True)
+    for rel in files:
+        copy_file(os.path.join(run_dir, rel), os.path.join(tmp_entry, "files", rel))
+    os.makedirs(tmp_entry, exist_ok=True)
+    with open(os.path.join(tmp_entry, "result.json"), "w", encoding="utf-8") as f:
+        json.dump({"result": packed, "files": files}, f, indent=2)
+
+    try:
+        os.rename(tmp_entry, entry)
+    except OSError:
+        # Another run stored the same entry first
+        shutil.rmtree(tmp_entry, ignore_errors=True)
+        return
+    _evict()
+
+
+def cached_call(stage: str, key: str, run_dir: str, func, inputs: dict):
+    """
+    Run `func(inputs)` unless a result for `key` is cached.
+    Module-level so it can wrap CPU stages sent to the process pool.
+    """
+    hit, result = lookup(stage, key, run_dir)
+    if hit:
+        print(f"[Cache] {stage}: hit ({key[:8]}), skipping.")
+        return result
+
+    result = func(inputs)
+    try:
+        store(stage, key, result, run_dir)
+    except OSError as e:
+        # A full disk must not fail the render itself
+        print(f"[Cache] Could not store {stage} result: {e}")
+    return result
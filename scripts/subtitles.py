@@ -1,16 +1,73 @@
 """
 Step 6 — Subtitles: generate .srt with Whisper and burn into video with FFmpeg.
-Uses OpenAI Whisper (free, local) for speech-to-text.
+Uses OpenAI Whisper (free, local) for speech-to-text. When the narration
+text is known, align_script times its words against the audio instead,
+which is faster than transcribing and keeps the script's spelling.
+Timed words can also be written as karaoke ASS captions (words_to_ass),
+which libass animates while burning them in, at no extra render cost.
 """
 
 import subprocess
 import os
+import re
 import shutil
 
+import numpy as np
+
+from scripts.media import FFMPEG, escape_filter_path
+from scripts.encoding import get_profile, x264_args
+from scripts.transcriber import (
+    transcribe,
+    backend_available,
+    ADDRESS as TRANSCRIBER_ADDRESS,
+    WHISPER_BACKEND,
+    WHISPER_MODEL,
+    WHISPER_THREADS,
+)
+
 AUDIO_PATH = os.path.join("assets", "audio", "voice.mp3")
 VIDEO_INPUT = os.path.join("assets", "video", "final.mp4")
 VIDEO_OUTPUT = os.path.join("assets", "video", "final_subtitled.mp4")
 SRT_OUTPUT = os.path.join("assets", "audio", "voice.srt")
+SUBTITLE_STYLE = "FontSize=24,PrimaryColour=&H00FFFFFF,OutlineColour=&H00000000,Outline=2"
+# Burn word-by-word highlighted ASS captions instead of plain SRT lines
+KARAOKE = os.getenv("SUBTITLES_KARAOKE", "1") != "0"
+
+# Karaoke caption styles per video format, in the output's pixels. Words
+# turn from `secondary` to `primary` as they are spoken (colours &HBBGGRR).
+ASS_PRESETS = {
+    "landscape": {
+        "play_res": (1920, 1080),
+        "font": "Arial",
+        "size": 64,
+        "primary": "&H0000D7FF",
+        "secondary": "&H00FFFFFF",
+        "outline": 3,
+        "shadow": 1,
+        "margin_v": 70,
+        "max_words": 7,
+    },
+    # Shorts: big, few words at a time, above the player controls
+    "portrait": {
+        "play_res": (1080, 1920),
+        "font": "Arial",
+        "size": 92,
+        "primary": "&H0000D7FF",
+        "secondary": "&H00FFFFFF",
+        "outline": 5,
+        "shadow": 2,
+        "margin_v": 560,
+        "max_words": 3,
+    },
+}
+
+# Align the known script to the audio rather than transcribing it
+ALIGN_SCRIPT = os.getenv("SUBTITLES_ALIGN", "1") != "0"
+
+# Script alignment works on 10 ms energy frames of 16 kHz mono audio
+_ALIGN_RATE = 16000
+_FRAME_SECONDS = 0.01
+_MIN_PAUSE_FRAMES = 12  # silences shorter than this are inside a phrase
 
 
 def generate_srt(audio_path: str = AUDIO_PATH, output_dir: str = None) -> str:
@@ -24,20 +81,23 @@ def generate_srt(audio_path: str = AUDIO_PATH, output_dir: str = None) -> str:
     if not os.path.exists(audio_path):
         raise FileNotFoundError(f"Audio not found: {audio_path}")
 
-    # Check if whisper CLI is available
-    whisper_cmd = shutil.which("whisper")
-    if whisper_cmd is None:
-        # Try using the Python module directly
-        print("[Subtitles] whisper CLI not found, using Python module...")
+    # Prefer the warm transcriber (scripts/transcriber.py): the model stays
+    # loaded between runs, while the CLI reloads PyTorch and the model every time
+    if TRANSCRIBER_ADDRESS or backend_available(WHISPER_BACKEND):
         return _generate_srt_python(audio_path, output_dir)
 
+    if shutil.which("whisper") is None:
+        raise RuntimeError("Whisper is not installed (neither the Python module nor the CLI).")
+
+    print(f"[Subtitles] {WHISPER_BACKEND} not importable, using the whisper CLI...")
     cmd = [
         "whisper",
         audio_path,
-        "--model", "tiny",
+        "--model", WHISPER_MODEL,
         "--output_format", "srt",
         "--output_dir", output_dir,
         "--language", "en",
+        "--threads", str(WHISPER_THREADS),
     ]
 
     print(f"[Subtitles] Running: {' '.join(cmd)}")
@@ -55,26 +115,144 @@ def generate_srt(audio_path: str = AUDIO_PATH, output_dir: str = None) -> str:
 
 
 def _generate_srt_python(audio_path: str, output_dir: str) -> str:
-    """Fallback: use whisper Python API directly."""
-    import whisper
-
-    model = whisper.load_model("tiny")
-    result = model.transcribe(audio_path, language="en")
+    """Transcribe with the warm Whisper model of the transcriber."""
+    segments = transcribe(audio_path, WHISPER_MODEL)
 
     base = os.path.splitext(os.path.basename(audio_path))[0]
     srt_path = os.path.join(output_dir, f"{base}.srt")
 
-    with open(srt_path, "w", encoding="utf-8") as f:
-        for i, seg in enumerate(result["segments"], 1):
-            start = _format_timestamp(seg["start"])
-            end = _format_timestamp(seg["end"])
-            text = seg["text"].strip()
-            f.write(f"{i}\n{start} --> {end}\n{text}\n\n")
+    write_srt(segments, srt_path)
 
     print(f"[Subtitles] SRT generated → {srt_path}")
     return srt_path
 
 
+def _read_pcm(audio_path: str) -> np.ndarray:
+    """Decode audio to 16 kHz mono float samples with ffmpeg."""
+    result = subprocess.run(
+        [FFMPEG, "-hide_banner", "-loglevel", "error", "-i", audio_path,
+         "-ac", "1", "-ar", str(_ALIGN_RATE), "-f", "s16le", "-"],
+        capture_output=True,
+        check=True,
+    )
+    return np.frombuffer(result.stdout, dtype=np.int16).astype(np.float32) / 32768
+
+
+def _speech_frames(samples: np.ndarray) -> np.ndarray:
+    """Voice activity per 10 ms frame, from its energy relative to the loudest speech."""
+    hop = int(_ALIGN_RATE * _FRAME_SECONDS)
+    num_frames = len(samples) // hop
+    frames = samples[:num_frames * hop].reshape(num_frames, hop)
+    energy = 10 * np.log10(np.mean(frames ** 2, axis=1) + 1e-10)
+    floor, peak = np.percentile(energy, 10), np.percentile(energy, 95)
+    speech = energy > max(peak - 35, floor + 6)
+
+    # Close the short gaps of stop consonants, drop isolated clicks
+    for value, max_run in ((False, 8), (True, 3)):
+        runs = _runs(speech)
+        for start, end, run_value in runs[1:-1]:
+            if run_value == value and end - start < max_run:
+                speech[start:end] = not value
+    return speech
+
+
+def _runs(mask: np.ndarray) -> list[tuple[int, int, bool]]:
+    """(start, end, value) for each run of equal values in `mask`."""
+    edges = np.flatnonzero(np.diff(mask.astype(np.int8))) + 1
+    bounds = [0, *edges.tolist(), len(mask)]
+    return [(a, b, bool(mask[a])) for a, b in zip(bounds, bounds[1:]) if b > a]
+
+
+def _syllables(word: str) -> int:
+    """Rough spoken length of a word: vowel groups, or digits for numbers."""
+    digits = sum(c.isdigit() for c in word)
+    return max(1, len(re.findall(r"[aeiouy]+", word.lower())) + digits)
+
+
+def _match_breaks(expected: list[float], pauses: list[float], tolerance: float) -> dict:
+    """
+    Pair phrase breaks with detected pauses, in order, minimizing the
+    distance between where each break is expected and where the pause is.
+    Returns {break index: pause index}.
+    """
+    n, m = len(expected), len(pauses)
+    # cost[i][j]: best cost for the first i breaks and the first j pauses
+    cost = [[0.0] * (m + 1) for _ in range(n + 1)]
+    for i in range(1, n + 1):
+        cost[i][0] = i * tolerance
+    for j in range(1, m + 1):
+        cost[0][j] = j * tolerance
+    for i in range(1, n + 1):
+        for j in range(1, m + 1):
+            best = min(cost[i - 1][j], cost[i][j - 1]) + tolerance
+            distance = abs(expected[i - 1] - pauses[j - 1])
+            if distance < tolerance:
+                best = min(best, cost[i - 1][j - 1] + distance)
+            cost[i][j] = best
+
+    matches, i, j = {}, n, m
+    while i > 0 and j > 0:
+        distance = abs(expected[i - 1] - pauses[j - 1])
+        if distance < tolerance and cost[i][j] == cost[i - 1][j - 1] + distance:
+            matches[i - 1] = j - 1
+            i, j = i - 1, j - 1
+        elif cost[i][j] == cost[i - 1][j] + tolerance:
+            i -= 1
+        else:
+            j -= 1
+    return matches
+
+
+def align_script(script_text: str, audio_path: str) -> list[dict]:
+    """
+    Time every word of the known narration against the audio, without
+    transcribing it: voice activity gives the speech and the pauses, phrase
+    breaks in the script (punctuation) are matched to the pauses, and the
+    words between them share the speech time by syllable count.
+    Returns [{"word", "start", "end"}] with times in seconds.
+    """
+    words = script_text.split()
+    if not words:
+        return []
+    speech = _speech_frames(_read_pcm(audio_path))
+    speech_index = np.flatnonzero(speech)  # speech frame → audio frame
+    if len(speech_index) == 0:
+        raise RuntimeError(f"No speech detected in {audio_path}")
+
+    # Pauses inside the narration, as positions on the speech-only timeline
+    pauses, speech_before = [], 0
+    for start, end, is_speech in _runs(speech):
+        if is_speech:
+            speech_before += end - start
+        elif end - start >= _MIN_PAUSE_FRAMES and 0 < speech_before < len(speech_index):
+            pauses.append(speech_before)
+
+    weights = np.array([_syllables(w) for w in words], dtype=float)
+    cumulative = np.concatenate([[0.0], np.cumsum(weights)]) / weights.sum() * len(speech_index)
+    breaks = [i + 1 for i, w in enumerate(words[:-1]) if w.endswith((",", ".", "!", "?", ";", ":"))]
+    tolerance = max(50.0, 0.08 * len(speech_index))
+    matches = _match_breaks([cumulative[b] for b in breaks], pauses, tolerance)
+
+    # Anchor matched breaks on their pauses and spread the words in between
+    anchors = [(0, 0)] + [(breaks[k], pauses[p]) for k, p in sorted(matches.items())]
+    anchors.append((len(words), len(speech_index)))
+    positions = np.empty(len(words) + 1)
+    for (w0, s0), (w1, s1) in zip(anchors, anchors[1:]):
+        span = cumulative[w0:w1 + 1] - cumulative[w0]
+        positions[w0:w1 + 1] = s0 + span / max(span[-1], 1e-9) * (s1 - s0)
+
+    timed = []
+    for k, word in enumerate(words):
+        first = min(int(round(positions[k])), len(speech_index) - 1)
+        last = min(max(int(round(positions[k + 1])) - 1, first), len(speech_index) - 1)
+        timed.append({
+            "word": word,
+            "start": round(float(speech_index[first]) * _FRAME_SECONDS, 3),
+            "end": round(float(speech_index[last] + 1) * _FRAME_SECONDS, 3),
+        })
+    return timed
+
+
 def _format_timestamp(seconds: float) -> str:
     """Convert seconds to SRT timestamp format HH:MM:SS,mmm."""
     hrs = int(seconds // 3600)
@@ -84,13 +262,135 @@ def _format_timestamp(seconds: float) -> str:
     return f"{hrs:02d}:{mins:02d}:{secs:02d},{millis:03d}"
 
 
+def _parse_timestamp(stamp: str) -> float:
+    hrs, mins, secs = stamp.replace(",", ".").split(":")
+    return int(hrs) * 3600 + int(mins) * 60 + float(secs)
+
+
+_CUE_RE = re.compile(
+    r"(\d+:\d+:\d+[,.]\d+)\s*-->\s*(\d+:\d+:\d+[,.]\d+)[^\n]*\n(.*?)(?:\n\s*\n|\Z)",
+    re.S,
+)
+
+
+def parse_srt(srt_path: str) -> list[tuple[float, float, str]]:
+    """Read an .srt file into (start, end, text) cues, times in seconds."""
+    with open(srt_path, "r", encoding="utf-8") as f:
+        content = f.read().replace("\r\n", "\n")
+    return [
+        (_parse_timestamp(start), _parse_timestamp(end), " ".join(text.split()))
+        for start, end, text in _CUE_RE.findall(content)
+    ]
+
+
+def write_srt(cues: list[tuple[float, float, str]], srt_path: str) -> str:
+    """Write (start, end, text) cues as an .srt file."""
+    with open(srt_path, "w", encoding="utf-8") as f:
+        for i, (start, end, text) in enumerate(cues, 1):
+            f.write(f"{i}\n{_format_timestamp(start)} --> {_format_timestamp(end)}\n{text.strip()}\n\n")
+    return srt_path
+
+
+def _group_words(words: list[dict], max_words: int) -> list[list[dict]]:
+    """Runs of at most `max_words`, also breaking after sentence-ending punctuation."""
+    groups, current = [], []
+    for word in words:
+        current.append(word)
+        if len(current) >= max_words or word["word"].endswith((".", "!", "?")):
+            groups.append(current)
+            current = []
+    if current:
+        groups.append(current)
+    return groups
+
+
+def words_to_cues(words: list[dict], max_words: int = 7) -> list[tuple[float, float, str]]:
+    """
+    Group timed words ({"word", "start", "end"}) into subtitle cues of at
+    most `max_words`, also breaking after sentence-ending punctuation.
+    """
+    return [
+        (group[0]["start"], group[-1]["end"], " ".join(w["word"] for w in group))
+        for group in _group_words(words, max_words)
+    ]
+
+
+def _ass_timestamp(seconds: float) -> str:
+    """ASS timestamp H:MM:SS.cc."""
+    centis = int(round(seconds * 100))
+    return f"{centis // 360000}:{centis // 6000 % 60:02d}:{centis // 100 % 60:02d}.{centis % 100:02d}"
+
+
+def words_to_ass(words: list[dict], ass_path: str, format_type: str = "landscape") -> str:
+    """
+    Write timed words as karaoke ASS captions: each line shows a group of
+    words and highlights them one by one with per-word `\\k` durations.
+    format_type picks the style preset (see ASS_PRESETS).
+    """
+    preset = ASS_PRESETS.get(format_type, ASS_PRESETS["landscape"])
+    width, height = preset["play_res"]
+    lines = [
+        "[Script Info]",
+        "ScriptType: v4.00+",
+        f"PlayResX: {width}",
+        f"PlayResY: {height}",
+        "WrapStyle: 0",
+        "ScaledBorderAndShadow: yes",
+        "",
+        "[V4+ Styles]",
+        "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, "
+        "BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, "
+        "BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding",
+        f"Style: Karaoke,{preset['font']},{preset['size']},{preset['primary']},{preset['secondary']},"
+        f"&H00000000,&H80000000,-1,0,0,0,100,100,0,0,1,{preset['outline']},{preset['shadow']},"
+        f"2,60,60,{preset['margin_v']},1",
+        "",
+        "[Events]",
+        "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text",
+    ]
+    for group in _group_words(words, preset["max_words"]):
+        start, end = group[0]["start"], group[-1]["end"]
+        parts = []
+        for i, word in enumerate(group):
+            # Each word is highlighted until the next one starts; rounding
+            # the running offsets keeps the total in step with the audio
+            until = group[i + 1]["start"] if i + 1 < len(group) else end
+            centis = round((until - start) * 100) - round((word["start"] - start) * 100)
+            text = word["word"].replace("\\", "").replace("{", "(").replace("}", ")")
+            parts.append(f"{{\\k{max(centis, 1)}}}{text}")
+        lines.append(
+            f"Dialogue: 0,{_ass_timestamp(start)},{_ass_timestamp(end)},Karaoke,,0,0,0,,{' '.join(parts)}"
+        )
+
+    with open(ass_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    return ass_path
+
+
+def subtitle_filter(srt_path: str, style: str = SUBTITLE_STYLE) -> str:
+    """
+    FFmpeg `subtitles` filter that renders `srt_path` with libass. .ass
+    files keep their own styles; `style` only applies to .srt.
+    """
+    if srt_path.lower().endswith(".ass"):
+        return f"subtitles='{escape_filter_path(srt_path)}'"
+    return f"subtitles='{escape_filter_path(srt_path)}':force_style='{style}'"
+
+
 def burn_subtitles(
     video_input: str = VIDEO_INPUT,
     srt_path: str = SRT_OUTPUT,
     video_output: str = VIDEO_OUTPUT,
+    style: str = SUBTITLE_STYLE,
+    profile: str = "upload-quality",
+    moving: bool = False,
 ) -> str:
     """
     Burn .srt subtitles into the video using FFmpeg.
+    srt_path: .srt, or .ass captions (e.g. from words_to_ass).
+    style:   libass force_style overrides for .srt (font size, colours, outline).
+    profile: encoding profile for the re-encode (see scripts/encoding.py).
+    moving:  the video has motion or transitions (see get_profile).
     Returns the path to the subtitled video.
     """
     if not os.path.exists(video_input):
@@ -98,13 +398,11 @@ def burn_subtitles(
     if not os.path.exists(srt_path):
         raise FileNotFoundError(f"SRT not found: {srt_path}")
 
-    # FFmpeg requires forward slashes or escaped backslashes in subtitle paths
-    srt_escaped = srt_path.replace("\\", "/").replace(":", "\\:")
-
     cmd = [
-        "ffmpeg", "-y",
+        FFMPEG, "-y",
         "-i", video_input,
-        "-vf", f"subtitles='{srt_escaped}':force_style='FontSize=24,PrimaryColour=&H00FFFFFF,OutlineColour=&H00000000,Outline=2'",
+        "-vf", subtitle_filter(srt_path, style),
+        *x264_args(get_profile(profile, moving)),
         "-c:a", "copy",
         video_output,
     ]
@@ -4,6 +4,7 @@ Creates a bold, text-overlay thumbnail from the first downloaded image.
 """
 
 import os
+from functools import lru_cache
 from PIL import Image, ImageDraw, ImageFont
 
 IMAGES_DIR = os.path.join("assets", "images")
@@ -19,6 +20,17 @@ THUMB_WIDTH = 1280
 THUMB_HEIGHT = 720
 
 
+@lru_cache(maxsize=8)
+def _load_font(font_size: int):
+    """Find a bold font once per size; later thumbnails reuse the loaded face."""
+    for font_name in ["arialbd.ttf", "Arial Bold.ttf", "DejaVuSans-Bold.ttf", "arial.ttf"]:
+        try:
+            return ImageFont.truetype(font_name, font_size)
+        except (IOError, OSError):
+            continue
+    return ImageFont.load_default()
+
+
 def create_thumbnail(
     title: str,
     image_path: str = None,
@@ -56,17 +68,7 @@ def create_thumbnail(
     draw = ImageDraw.Draw(img)
 
     # Try to use a bold font; fall back to default
-    font_size = 72
-    font = None
-    for font_name in ["arialbd.ttf", "Arial Bold.ttf", "DejaVuSans-Bold.ttf", "arial.ttf"]:
-        try:
-            font = ImageFont.truetype(font_name, font_size)
-            break
-        except (IOError, OSError):
-            continue
-
-    if font is None:
-        font = ImageFont.load_default()
+    font = _load_font(72)
 
     # Word-wrap the title text
     max_chars_per_line = 25 if format_type == "landscape" else 15
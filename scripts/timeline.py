@@ -0,0 +1,223 @@
+"""
+Timeline — when each scene is on screen, derived from the narration.
+Every scene is mapped to its span of script words (the Gemini scene
+segments, or an even split on sentence boundaries), and every script word
+gets a time from the Edge TTS word boundaries, the Whisper transcript or,
+without either, an estimate proportional to its length. The result is saved once as timeline.json and
+reused by the renderer (scene durations), the thumbnail (longest scene)
+and the subtitles (fallback cues when there is no transcript).
+"""
+
+import os
+import re
+import json
+import difflib
+
+from scripts.subtitles import parse_srt
+
+
+def _normalize(word: str) -> str:
+    return re.sub(r"[^\w']", "", word.lower())
+
+
+def _segment_starts(script_words: list[str], segments: list[str]) -> list[int]:
+    """Index of the script word where each scene segment begins."""
+    norm = [_normalize(w) for w in script_words]
+    lengths = [len(segment.split()) for segment in segments]
+    scale = len(script_words) / max(sum(lengths), 1)
+
+    starts, cursor, cumulative = [0], 1, 0
+    for prev_length, segment in zip(lengths, segments[1:]):
+        cumulative += prev_length
+        probe = [w for w in (_normalize(w) for w in segment.split()) if w][:4]
+        found = None
+        for j in range(cursor, len(norm) - len(probe) + 1):
+            if norm[j:j + len(probe)] == probe:
+                found = j
+                break
+        # Fall back to where the segment lengths say it should start
+        start = found if found is not None else max(cursor, round(cumulative * scale))
+        starts.append(min(start, len(script_words) - 1))
+        cursor = starts[-1] + 1
+    return starts
+
+
+def _sentence_starts(script_words: list[str], num_scenes: int) -> list[int]:
+    """Split into `num_scenes` runs of roughly equal length at sentence ends."""
+    sentence_starts = [0] + [
+        i + 1 for i, word in enumerate(script_words[:-1]) if word.endswith((".", "!", "?"))
+    ]
+    if len(sentence_starts) < num_scenes:
+        # Too few sentences: split on words instead
+        return [round(k * len(script_words) / num_scenes) for k in range(num_scenes)]
+
+    starts = [0]
+    for k in range(1, num_scenes):
+        target = k * len(script_words) / num_scenes
+        candidates = [s for s in sentence_starts if s > starts[-1]]
+        # Leave enough sentences for the remaining scenes
+        candidates = candidates[:len(candidates) - (num_scenes - 1 - k)] or candidates
+        starts.append(min(candidates, key=lambda s: abs(s - target)))
+    return starts
+
+
+def _whisper_words(srt_path: str) -> list[dict]:
+    """Words of a transcript, each cue's time shared out by word length."""
+    words = []
+    for start, end, text in parse_srt(srt_path):
+        cue_words = text.split()
+        total = sum(len(w) + 1 for w in cue_words) or 1
+        t = start
+        for w in cue_words:
+            step = (end - start) * (len(w) + 1) / total
+            words.append({"word": w, "start": t, "end": t + step})
+            t += step
+    return words
+
+
+def _estimate_times(script_words: list[str], duration: float) -> list[dict]:
+    total = sum(len(w) + 1 for w in script_words) or 1
+    words, t = [], 0.0
+    for w in script_words:
+        step = duration * (len(w) + 1) / total
+        words.append({"word": w, "start": t, "end": t + step})
+        t += step
+    return words
+
+
+def _align_times(script_words: list[str], heard: list[dict], duration: float) -> list[dict]:
+    """
+    Give each script word the time of the transcript word it matches;
+    unmatched runs are spread evenly between their matched neighbours.
+    """
+    matcher = difflib.SequenceMatcher(
+        None,
+        [_normalize(w) for w in script_words],
+        [_normalize(w["word"]) for w in heard],
+        autojunk=False,
+    )
+    times = [None] * len(script_words)
+    for block in matcher.get_matching_blocks():
+        for k in range(block.size):
+            match = heard[block.b + k]
+            times[block.a + k] = (match["start"], match["end"])
+
+    i = 0
+    while i < len(times):
+        if times[i] is not None:
+            i += 1
+            continue
+        j = i
+        while j < len(times) and times[j] is None:
+            j += 1
+        gap_start = times[i - 1][1] if i > 0 else 0.0
+        gap_end = times[j][0] if j < len(times) else duration
+        step = max(gap_end - gap_start, 0.0) / (j - i)
+        for k in range(i, j):
+            times[k] = (gap_start + (k - i) * step, gap_start + (k - i + 1) * step)
+        i = j
+
+    return [
+        {"word": word, "start": round(start, 3), "end": round(end, 3)}
+        for word, (start, end) in zip(script_words, times)
+    ]
+
+
+def build_timeline(
+    script_text: str,
+    num_scenes: int,
+    duration: float,
+    segments: list[str] = None,
+    srt_path: str = None,
+    words: list[dict] = None,
+    words_source: str = "tts",
+) -> dict:
+    """
+    Compute scene and word timings for the narration.
+
+    segments: script excerpt per scene (from generate_package); without
+              them scenes are split evenly on sentence boundaries.
+    srt_path: Whisper transcript of the voiceover.
+    words:    timed words from Edge TTS or script alignment (see
+              generate_voice.load_words); preferred over the transcript.
+              With neither, word times are estimated from the script alone.
+    words_source: where `words` came from, recorded as the source.
+    Returns {"duration", "source", "scenes": [{"index", "start", "end",
+    "text"}], "words": [{"word", "start", "end"}]}.
+    """
+    script_words = script_text.split()
+    num_scenes = max(1, min(num_scenes, len(script_words)))
+
+    if segments and len(segments) == num_scenes:
+        starts = _segment_starts(script_words, segments)
+    else:
+        starts = _sentence_starts(script_words, num_scenes)
+
+    if words:
+        # TTS words carry no punctuation; aligning puts the times back on
+        # the script's own words
+        words = _align_times(script_words, words, duration)
+        source = words_source
+    elif srt_path and os.path.exists(srt_path):
+        words = _align_times(script_words, _whisper_words(srt_path), duration)
+        source = "transcript"
+    else:
+        words = _estimate_times(script_words, duration)
+        source = "estimate"
+
+    scenes = []
+    for k, start in enumerate(starts):
+        end_word = starts[k + 1] if k + 1 < len(starts) else len(script_words)
+        scenes.append({
+            "index": k,
+            "start": 0.0 if k == 0 else words[start]["start"],
+            "end": duration if k + 1 == len(starts) else words[end_word]["start"],
+            "text": " ".join(script_words[start:end_word]),
+        })
+
+    return {"duration": duration, "source": source, "scenes": scenes, "words": words}
+
+
+def save_timeline(timeline: dict, path: str) -> str:
+    """Write the timeline as JSON and return its path."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(timeline, f, indent=2)
+    return path
+
+
+def load_timeline(path: str) -> dict:
+    """Read a timeline written by save_timeline."""
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _scene_index(image_path: str):
+    match = re.search(r"img(\d+)\.jpg$", os.path.basename(image_path))
+    return int(match.group(1)) if match else None
+
+
+def image_durations(timeline: dict, image_files: list[str]) -> list[float] | None:
+    """
+    Seconds each image (img<scene>.jpg) stays on screen. A scene without an
+    image extends the image before it. Returns None if the images don't
+    correspond to the timeline's scenes.
+    """
+    scenes = timeline["scenes"]
+    indices = [_scene_index(path) for path in image_files]
+    if not indices or any(i is None or i >= len(scenes) for i in indices):
+        return None
+
+    durations = []
+    for n, index in enumerate(indices):
+        start = 0.0 if n == 0 else scenes[index]["start"]
+        end = scenes[indices[n + 1]]["start"] if n + 1 < len(indices) else timeline["duration"]
+        durations.append(max(end - start, 0.0))
+    return durations
+
+
+def longest_scene_image(timeline: dict, image_files: list[str]) -> str | None:
+    """The image shown the longest, or None if they don't match the timeline."""
+    durations = image_durations(timeline, image_files)
+    if not durations:
+        return None
+    return max(zip(durations, image_files))[1]
@@ -0,0 +1,280 @@
+"""
+Transcriber — a long-lived Whisper worker that keeps the model loaded.
+Every transcription request goes to one worker thread that owns the
+models: it drains whatever has queued up, transcribes each distinct audio
+file once (duplicate requests share the result, and recent results are
+kept for files that haven't changed) and answers every caller.
+
+Two backends are available (WHISPER_BACKEND): "openai-whisper" (PyTorch)
+and "faster-whisper" (CTranslate2 with int8 weights on the CPU, skipping
+silence with its VAD filter), which runs `base` or `small` at roughly the
+cost of the PyTorch `tiny`.
+
+Pipeline worker processes each hold their own in-process transcriber. Set
+TRANSCRIBER_ADDRESS to run it as a service behind a local socket instead,
+so all of them share a single loaded model (started with the job queue, or
+with `python -m scripts.transcriber`). Clients authenticate with
+TRANSCRIBER_AUTHKEY: the job queue generates a random one for its workers
+when it is unset, and a service outside the loopback interface refuses to
+start without one.
+"""
+
+import os
+import time
+import ipaddress
+import queue
+import threading
+import multiprocessing
+import importlib.util
+from collections import OrderedDict
+from concurrent.futures import Future
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Listener, Client
+
+WHISPER_BACKEND = os.getenv("WHISPER_BACKEND", "openai-whisper")  # or "faster-whisper"
+WHISPER_MODEL = os.getenv("WHISPER_MODEL", "tiny")  # tiny, base or small
+# faster-whisper only: weight precision and voice-activity filtering
+WHISPER_COMPUTE_TYPE = os.getenv("WHISPER_COMPUTE_TYPE", "int8")
+WHISPER_VAD = os.getenv("WHISPER_VAD", "1") != "0"
+# CPU threads for the model (PyTorch's intra-op pool)
+WHISPER_THREADS = int(os.getenv("WHISPER_THREADS", "0")) or os.cpu_count() or 1
+# "host:port" (or a Unix socket path) of a shared transcription service;
+# empty keeps the model in each process
+ADDRESS = os.getenv("TRANSCRIBER_ADDRESS", "")
+RECENT_RESULTS = 32  # transcripts remembered for repeat requests
+
+
+def _load_openai_whisper(name: str, threads: int):
+    """PyTorch Whisper; returns a function transcribing one file."""
+    import torch
+    import whisper
+
+    torch.set_num_threads(threads)
+    model = whisper.load_model(name, device="cpu")
+
+    def run(audio_path: str) -> list[tuple[float, float, str]]:
+        result = model.transcribe(audio_path, language="en", fp16=False)
+        return [(seg["start"], seg["end"], seg["text"]) for seg in result["segments"]]
+    return run
+
+
+def _load_faster_whisper(name: str, threads: int):
+    """CTranslate2 Whisper (faster-whisper); returns a function transcribing one file."""
+    from faster_whisper import WhisperModel
+
+    model = WhisperModel(name, device="cpu", compute_type=WHISPER_COMPUTE_TYPE, cpu_threads=threads)
+
+    def run(audio_path: str) -> list[tuple[float, float, str]]:
+        # Segments are generated lazily; the list runs the transcription
+        segments, _ = model.transcribe(audio_path, language="en", vad_filter=WHISPER_VAD)
+        return [(seg.start, seg.end, seg.text) for seg in segments]
+    return run
+
+
+# Backend name → (module it needs, loader returning a transcribe function)
+BACKENDS = {
+    "openai-whisper": ("whisper", _load_openai_whisper),
+    "faster-whisper": ("faster_whisper", _load_faster_whisper),
+}
+
+
+def backend_available(backend: str = WHISPER_BACKEND) -> bool:
+    """Whether the backend's Python package is installed; ValueError for unknown names."""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown Whisper backend '{backend}' (expected one of {', '.join(BACKENDS)})")
+    return importlib.util.find_spec(BACKENDS[backend][0]) is not None
+
+
+def _parse_address(address: str):
+    host, sep, port = address.rpartition(":")
+    return (host or "localhost", int(port)) if sep and port.isdigit() else address
+
+
+def is_local(address: str) -> bool:
+    """Whether `address` is a Unix socket or on the loopback interface."""
+    parsed = _parse_address(address)
+    if isinstance(parsed, str):
+        return True
+    try:
+        return ipaddress.ip_address(parsed[0]).is_loopback
+    except ValueError:
+        return parsed[0] == "localhost"
+
+
+def _authkey() -> bytes:
+    # Read at call time: start_workers may set it after this module is imported
+    key = os.getenv("TRANSCRIBER_AUTHKEY", "")
+    if not key:
+        raise RuntimeError("TRANSCRIBER_AUTHKEY is not set")
+    return key.encode("utf-8")
+
+
+def _check_address(address: str):
+    # The service unpickles what it receives: never expose it without a real key
+    if not is_local(address) and not os.getenv("TRANSCRIBER_AUTHKEY"):
+        raise ValueError(
+            f"Refusing to serve on non-loopback address {address} without TRANSCRIBER_AUTHKEY"
+        )
+
+
+class Transcriber:
+    """Owns the loaded Whisper models and serves requests from one thread."""
+
+    def __init__(self, backend: str = WHISPER_BACKEND, threads: int = WHISPER_THREADS):
+        backend_available(backend)
+        self.backend = backend
+        self.threads = threads
+        self._models = {}
+        self._recent = OrderedDict()  # (model, path, mtime, size) → segments
+        self._requests = queue.Queue()
+        self._worker = None
+        self._lock = threading.Lock()
+        self._models_lock = threading.Lock()
+
+    def transcribe(self, audio_path: str, model: str = WHISPER_MODEL) -> list[tuple[float, float, str]]:
+        """Transcribe `audio_path`; blocks until done. Returns (start, end, text) segments."""
+        future = Future()
+        self._requests.put((model, os.path.abspath(audio_path), future))
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="transcriber", daemon=True)
+                self._worker.start()
+        return future.result()
+
+    def load(self, name: str = WHISPER_MODEL):
+        """Load a model (once) so the first request doesn't wait for it."""
+        with self._models_lock:
+            if name not in self._models:
+                print(f"[Transcriber] Loading Whisper model '{name}' "
+                      f"({self.backend}, {self.threads} threads)...")
+                self._models[name] = BACKENDS[self.backend][1](name, self.threads)
+            return self._models[name]
+
+    def _run(self):
+        while True:
+            # Take everything that queued up while the last batch ran
+            batch = [self._requests.get()]
+            while True:
+                try:
+                    batch.append(self._requests.get_nowait())
+                except queue.Empty:
+                    break
+
+            # The same file (unchanged since it was requested) is transcribed once
+            pending = {}
+            for model, path, future in batch:
+                try:
+                    stat = os.stat(path)
+                    key = (model, path, stat.st_mtime_ns, stat.st_size)
+                except OSError as e:
+                    future.set_exception(e)
+                    continue
+                pending.setdefault(key, []).append(future)
+            if len(batch) > 1:
+                print(f"[Transcriber] Batch of {len(batch)} requests, {len(pending)} distinct")
+
+            for key, futures in pending.items():
+                model, path = key[:2]
+                try:
+                    segments = self._recent.get(key)
+                    if segments is None:
+                        segments = self.load(model)(path)
+                except Exception as e:
+                    for future in futures:
+                        future.set_exception(e)
+                    continue
+                self._recent[key] = segments
+                self._recent.move_to_end(key)
+                if len(self._recent) > RECENT_RESULTS:
+                    self._recent.popitem(last=False)
+                for future in futures:
+                    future.set_result(segments)
+
+
+_transcriber = None
+_transcriber_lock = threading.Lock()
+
+
+def get_transcriber() -> Transcriber:
+    """The process-wide transcriber, created on first use."""
+    global _transcriber
+    with _transcriber_lock:
+        if _transcriber is None:
+            _transcriber = Transcriber()
+        return _transcriber
+
+
+def transcribe(audio_path: str, model: str = WHISPER_MODEL, address: str = ADDRESS) -> list[tuple[float, float, str]]:
+    """
+    Transcribe an audio file with the warm model: through the service at
+    `address` if one is configured, otherwise in this process.
+    """
+    if not address:
+        return get_transcriber().transcribe(audio_path, model)
+
+    for attempt in range(10):
+        try:
+            conn = Client(_parse_address(address), authkey=_authkey())
+            break
+        except ConnectionRefusedError:
+            # The service may still be starting up
+            if attempt == 9:
+                raise
+            time.sleep(0.5)
+    with conn:
+        conn.send((model, os.path.abspath(audio_path)))
+        status, payload = conn.recv()
+    if status != "ok":
+        raise RuntimeError(f"Transcription service failed: {payload}")
+    return payload
+
+
+def _handle(conn):
+    """Answer one client connection; concurrent clients are batched together."""
+    with conn:
+        try:
+            model, audio_path = conn.recv()
+            conn.send(("ok", get_transcriber().transcribe(audio_path, model)))
+        except EOFError:
+            pass
+        except Exception as e:
+            conn.send(("error", str(e)))
+
+
+def serve(address: str = ADDRESS):
+    """Run the transcription service until interrupted."""
+    global _transcriber
+    if not address:
+        raise ValueError("TRANSCRIBER_ADDRESS is not set")
+    _check_address(address)
+    # A forked process inherits the parent's transcriber but not its thread
+    _transcriber = Transcriber()
+    with Listener(_parse_address(address), authkey=_authkey()) as listener:
+        print(f"[Transcriber] Serving on {address} "
+              f"({WHISPER_BACKEND} model '{WHISPER_MODEL}', pid {os.getpid()})")
+        get_transcriber().load(WHISPER_MODEL)
+        try:
+            while True:
+                try:
+                    conn = listener.accept()
+                except (AuthenticationError, OSError) as e:
+                    print(f"[Transcriber] Rejected connection: {e}")
+                    continue
+                threading.Thread(target=_handle, args=(conn,), daemon=True).start()
+        except KeyboardInterrupt:
+            pass
+
+
+def start_service(address: str = ADDRESS):
+    """Start the service in a background process; returns it, or None if no address is set."""
+    if not address:
+        return None
+    _check_address(address)
+    _authkey()
+    proc = multiprocessing.Process(target=serve, args=(address,), name="transcriber", daemon=True)
+    proc.start()
+    return proc
+
+
+if __name__ == "__main__":
+    serve()
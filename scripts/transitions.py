@@ -0,0 +1,68 @@
+"""
+Scene transitions — crossfade, slide and dip-to-black between images.
+Rendered with ffmpeg's `xfade`, which only blends the frames inside each
+transition window; every other frame passes through untouched.
+"""
+
+import os
+
+TRANSITION = os.getenv("VIDEO_TRANSITION", "none")  # none, crossfade, slide or dip
+DURATION = float(os.getenv("VIDEO_TRANSITION_DURATION", "0.5"))  # seconds
+
+# Our names → xfade transition names
+XFADE_NAMES = {
+    "crossfade": "fade",
+    "slide": "slideleft",
+    "dip": "fadeblack",
+}
+
+
+def validate(transition: str):
+    """Raise ValueError for unknown transition names."""
+    if transition != "none" and transition not in XFADE_NAMES:
+        names = ", ".join(["none", *XFADE_NAMES])
+        raise ValueError(f"Unknown transition '{transition}' (expected one of {names})")
+
+
+def overlap_frames(boundaries: list[int], fps: float, duration: float = DURATION) -> int:
+    """
+    Transition length in frames, capped so a scene is never shorter than
+    the transitions into and out of it.
+    """
+    shortest = min(b - a for a, b in zip(boundaries, boundaries[1:]))
+    return max(0, min(round(duration * fps), shortest - 1))
+
+
+def clip_frames(boundaries: list[int], overlap: int) -> list[int]:
+    """
+    Frames each scene must provide so that transitions centered on the
+    scene boundaries overlap both neighbours without changing the total
+    length: every scene gains half an overlap on each inner edge.
+    """
+    last = len(boundaries) - 2
+    return [
+        (boundaries[i + 1] - boundaries[i])
+        + (overlap // 2 if i > 0 else 0)
+        + (overlap - overlap // 2 if i < last else 0)
+        for i in range(last + 1)
+    ]
+
+
+def xfade_chain(labels: list[str], boundaries: list[int], overlap: int, fps: float,
+                transition: str, output: str) -> list[str]:
+    """
+    filter_complex lines joining the streams `labels` with `transition`,
+    each centered on its scene boundary, ending in the stream `output`.
+    """
+    name = XFADE_NAMES[transition]
+    chains = []
+    current = labels[0]
+    for k, label in enumerate(labels[1:]):
+        offset = (boundaries[k + 1] - overlap // 2) / fps
+        joined = output if k == len(labels) - 2 else f"x{k}"
+        chains.append(
+            f"[{current}][{label}]xfade=transition={name}:"
+            f"duration={overlap / fps:.6f}:offset={offset:.6f}[{joined}]"
+        )
+        current = joined
+    return chains
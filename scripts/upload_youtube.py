@@ -21,6 +21,10 @@ TOKEN_FILE = "token.json"
 VIDEO_PATH = os.path.join("assets", "video", "final_subtitled.mp4")
 THUMBNAIL_PATH = os.path.join("assets", "video", "thumbnail.jpg")
 
+# Authenticated API client and its credentials, reused while the token is valid
+_service = None
+_credentials = None
+
 
 def _ensure_client_secrets():
     """Create client_secrets.json from .env variables if it doesn't exist."""
@@ -53,6 +57,18 @@ def _ensure_client_secrets():
 
 def _get_authenticated_service():
     """Authenticate with YouTube API, caching credentials in token.json."""
+    global _service, _credentials
+
+    # Long-lived workers keep the service object between uploads
+    if _service is not None and _credentials is not None:
+        if _credentials.valid:
+            return _service
+        if _credentials.expired and _credentials.refresh_token:
+            _credentials.refresh(Request())
+            with open(TOKEN_FILE, "w") as f:
+                f.write(_credentials.to_json())
+            return _service
+
     _ensure_client_secrets()
 
     credentials = None
@@ -76,7 +92,9 @@ def _get_authenticated_service():
             f.write(credentials.to_json())
         print("[Upload] Credentials saved.")
 
-    return build("youtube", "v3", credentials=credentials)
+    _credentials = credentials
+    _service = build("youtube", "v3", credentials=credentials)
+    return _service
 
 
 def upload_video(
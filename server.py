@@ -2,29 +2,23 @@
 Flask API Server for AI Video Pipeline
 =======================================
 Exposes /run endpoint to trigger video generation via HTTP POST.
+Requests are queued on disk and processed by a pool of worker processes;
+/jobs endpoints report their per-stage progress and results.
 """
 
-from flask import Flask, request, jsonify
-import subprocess
-import sys
-import os
-import threading
+import json
+import time
 
-app = Flask(__name__)
+from flask import Flask, request, jsonify, Response, stream_with_context
+
+from scripts import job_queue
 
-# Global lock to prevent concurrent pipeline executions
-pipeline_lock = threading.Lock()
+app = Flask(__name__)
+job_queue.init_db()
 
 
 @app.route("/run", methods=["POST"])
 def run_pipeline():
-    # Try to acquire lock (non-blocking)
-    if not pipeline_lock.acquire(blocking=False):
-        return jsonify({
-            "status": "busy",
-            "message": "Pipeline already running"
-        }), 429
-
     try:
         data = request.json
         
@@ -84,44 +78,101 @@ def run_pipeline():
         print(f"  Parsed - Upload: {upload}")
         print(f"  Parsed - Privacy: {privacy}")
 
-        # Get the directory where server.py is located
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        main_py_path = os.path.join(script_dir, "main.py")
-        
-        subprocess.run(
-            [
-                sys.executable,  # Use the same Python interpreter running Flask
-                main_py_path,
-                topic,
-                format_choice,
-                "true" if upload else "false",
-                privacy
-            ],
-            check=True,
-            cwd=script_dir  # Run from the project directory
-        )
+        job_id = job_queue.enqueue({
+            "topic": topic,
+            "format": format_choice,
+            "upload": upload,
+            "privacy": privacy,
+        })
 
         return jsonify({
-            "status": "success",
-            "message": "Pipeline executed successfully"
-        }), 200
+            "status": "queued",
+            "job_id": job_id,
+            "message": "Pipeline run queued"
+        }), 202
 
-    except subprocess.CalledProcessError as e:
-        return jsonify({
-            "status": "error",
-            "message": str(e)
-        }), 500
-    
     except Exception as e:
         return jsonify({
             "status": "error",
             "message": f"Server error: {str(e)}"
         }), 500
 
-    finally:
-        # Always release the lock
-        pipeline_lock.release()
+
+@app.route("/jobs", methods=["GET"])
+def list_jobs():
+    status = request.args.get("status")
+    limit = request.args.get("limit", 50, type=int)
+    return jsonify({"jobs": job_queue.list_jobs(status=status, limit=limit)}), 200
+
+
+@app.route("/jobs/<job_id>", methods=["GET"])
+def get_job(job_id):
+    job = job_queue.get_job(job_id)
+    if job is None:
+        return jsonify({
+            "status": "error",
+            "message": f"Unknown job: {job_id}"
+        }), 404
+    return jsonify(job), 200
+
+
+@app.route("/jobs/<job_id>/retry", methods=["POST"])
+def retry_job(job_id):
+    """Re-queue a failed job (or a done one whose upload failed); it resumes from its checkpoints."""
+    job = job_queue.get_job(job_id)
+    if job is None:
+        return jsonify({
+            "status": "error",
+            "message": f"Unknown job: {job_id}"
+        }), 404
+
+    if not job_queue.retry_job(job_id):
+        return jsonify({
+            "status": "error",
+            "message": f"Job {job_id} is {job['status']}; only failed jobs, or done jobs "
+                       "whose requested upload didn't happen, can be retried"
+        }), 409
+
+    return jsonify({
+        "status": "queued",
+        "job_id": job_id,
+        "run_id": job["run_id"],
+        "message": "Job re-queued; it will resume from its last checkpoint"
+    }), 202
+
+
+@app.route("/jobs/<job_id>/events", methods=["GET"])
+def job_events(job_id):
+    """Server-sent events stream: one event per progress change until the job ends."""
+    if job_queue.get_job(job_id) is None:
+        return jsonify({
+            "status": "error",
+            "message": f"Unknown job: {job_id}"
+        }), 404
+
+    def stream():
+        last_state = None
+        while True:
+            job = job_queue.get_job(job_id)
+            # Only emit when status or a stage changed (elapsed ticks don't count)
+            state = (job["status"], [(st["stage"], st["status"]) for st in job["stages"]])
+            if state != last_state:
+                last_state = state
+                yield f"event: progress\ndata: {json.dumps(job)}\n\n"
+            if job["status"] in ("done", "failed"):
+                yield f"event: end\ndata: {json.dumps({'status': job['status']})}\n\n"
+                return
+            time.sleep(1)
+
+    return Response(
+        stream_with_context(stream()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=5000)
+    # Workers must be started before Flask; disable the reloader so they
+    # aren't spawned twice.
+    job_queue.start_workers()
+    app.run(host="0.0.0.0", port=5000, use_reloader=False)